@@ -24,15 +24,16 @@ __credits__ = ["Diego Garcia Huerta", "Donat Van Bellinghen"]
 
 import os
 import sys
-import ctypes
 
 import logging
+import threading
+from collections import defaultdict, deque
 import sgtk
 from tank.platform import Engine
-import substance_painter as sp
 
-
-from PySide6 import QtWidgets, QtGui, QtCore
+# NOTE: substance_painter and PySide6 are imported where they are needed, so that
+# importing the engine module does not pull the whole Substance Painter binding
+# and Qt before any engine method actually runs.
 # from sgtk.platform.qt6 import QtWidgets, QtGui, QtCore # DOES NOT WORK
 
 
@@ -40,12 +41,42 @@ from PySide6 import QtWidgets, QtGui, QtCore
 # where an engine may not be present.
 logger = sgtk.LogManager.get_logger(__name__)
 
+_COMPAT_WARNING_TEMPLATE = (
+    "<b>Warning - ShotGrid Compatibility:</b><br>"
+    "ShotGrid has not yet been fully tested"
+    " with Substance Painter version {version}.<br>"
+    "You can continue to use Toolkit but you may experience bugs or instabilities."
+)
+
+# Path conversions between UNC and mapped drive paths only apply on Windows
+_IS_WINDOWS = sys.platform.startswith("win")
+
+# Maximum number of stacked override cursors restored before showing a modal dialog
+_MAX_OVERRIDE_CURSORS = 32
+
 
 class SubstancePainterEngine(Engine):
     """
     Toolkit engine for Adobe Substance Painter
     """
 
+    # Shared by all the log messages sent to Substance Painter.
+    # Unlike record.getMessage(), it also renders the exception info if any.
+    _log_formatter = logging.Formatter("%(message)s")
+
+    def __init__(self, *args, **kwargs):
+        # The logging state has to exist before the base class starts logging.
+        # Log messages waiting to be sent to Substance Painter from the main thread
+        self._log_queue = deque()
+        self._log_flush_lock = threading.Lock()
+        self._log_flush_pending = False
+        # Messages below this level are not sent to Substance Painter,
+        # set from the 'log_panel_min_level' setting, or the debug logging
+        # state, in init_engine()
+        self._sp_min_level = logging.DEBUG
+
+        super().__init__(*args, **kwargs)
+
     @property
     def context_change_allowed(self):
         """
@@ -73,11 +104,43 @@ class SubstancePainterEngine(Engine):
                   engine.
 
         """
+        import substance_painter as sp
+
         host_info = {"name": "substancepainter", "version": "unknown"}
         host_info["version"] = sp.application.version()
 
         return host_info
 
+    @property
+    def tk_substancepainter(self):
+        """
+        The tk_substancepainter module, imported on first access.
+        """
+        if self._tk_substancepainter is None:
+            self._tk_substancepainter = self.import_module("tk_substancepainter")
+        return self._tk_substancepainter
+
+    @property
+    def menu_generator(self):
+        """
+        The :class:`MenuGenerator` handling the ShotGrid menu, created on first access.
+        """
+        if self._menu_generator is None:
+            self._menu_generator = self.tk_substancepainter.MenuGenerator(
+                self, self._menu_name, self.substance_main_window
+            )
+        return self._menu_generator
+
+    @property
+    def callback_handler(self):
+        """
+        The :class:`CallbackHandler` handling the Substance Painter project events,
+        created on first access.
+        """
+        if self._callback_handler is None:
+            self._callback_handler = self.tk_substancepainter.CallbackHandler(self)
+        return self._callback_handler
+
     ##########################################################################################
     # init and destroy
 
@@ -85,36 +148,62 @@ class SubstancePainterEngine(Engine):
         """
         Initializes the Substance painter engine.
         """
+        import substance_painter as sp
+        from PySide6 import QtGui
+
         self.logger.debug(f"{self}: Initializing...")
 
         self._menu_name = "ShotGrid"
+
+        min_level_setting = self.get_setting("log_panel_min_level")
+        if min_level_setting:
+            min_level = logging.getLevelName(min_level_setting.upper())
+            if isinstance(min_level, int):
+                self._sp_min_level = min_level
+            else:
+                self.logger.warning(
+                    "Invalid 'log_panel_min_level' setting: %s", min_level_setting
+                )
+        elif not (
+            sgtk.LogManager().global_debug or self.get_setting("debug_logging", False)
+        ):
+            # Not set: the debug messages are only sent when debug logging is on
+            self._sp_min_level = logging.INFO
         self.substance_main_window = sp.ui.get_main_window()
         self._dock_widgets = {}
+        self._menu_rebuild_pending = False
+
+        # Created on first access, see the corresponding properties
+        self._tk_substancepainter = None
+        self._menu_generator = None
+        self._callback_handler = None
+
+        # (raw project path, converted project path) of the last call to get_project_path()
+        self._project_path_cache = (None, None)
+
+        # Resolved textures export work area paths, keyed by context entities
+        self._export_work_area_paths = {}
+
+        # Built once and shared by every panel
+        self._sg_panel_icon = QtGui.QIcon(
+            os.path.join(self.disk_location, "resources", "icons", "shotgrid.png")
+        )
 
     def pre_app_init(self):
         """
         Runs after the engine is set up but before any apps have been initialized.
         """
+        import substance_painter as sp
 
         substance_major_version = sp.application.version_info()[0]
-        if substance_major_version >= self.get_setting(
+        compatibility_dialog_min_version = self.get_setting(
             "compatibility_dialog_min_version"
-        ):
+        )
+        if substance_major_version >= compatibility_dialog_min_version:
             logger.warning(
-                "<b>Warning - ShotGrid Compatibility:</b><br>"
-                "ShotGrid has not yet been fully tested"
-                f" with Substance Painter version {substance_major_version}.<br>"
-                "You can continue to use Toolkit but you may experience bugs or instabilities."
+                _COMPAT_WARNING_TEMPLATE.format(version=substance_major_version)
             )
 
-        self.tk_substancepainter = self.import_module("tk_substancepainter")
-
-        self.menu_generator = self.tk_substancepainter.MenuGenerator(
-            self, self._menu_name, self.substance_main_window
-        )
-
-        self.callback_handler = self.tk_substancepainter.CallbackHandler(self)
-
         self.callback_handler.register_callbacks()
 
     def post_app_init(self):
@@ -122,13 +211,46 @@ class SubstancePainterEngine(Engine):
         Called when all apps have initialized
         """
 
-        self.menu_generator.setup_menu_items()
+        self._schedule_menu_rebuild()
 
         # Run a series of app instance commands at startup.
         self._run_app_instance_commands()
 
     def post_context_change(self, old_context, new_context):
+        # The settings of the new environment may differ
+        self._export_work_area_paths.clear()
+        self.tk_substancepainter.utils._get_prepared_mappings.cache_clear()
+        # The project path was converted with the mappings of the old context
+        self.clear_project_path_cache()
+        if self._menu_generator is not None:
+            self._menu_generator.invalidate_settings_cache()
+
         # Refresh the ShotGrid menu
+        self._schedule_menu_rebuild()
+
+    def _schedule_menu_rebuild(self):
+        """
+        Rebuilds the ShotGrid menu on the next event loop iteration, so that the
+        caller (e.g. a context change) does not block on it.
+        Successive requests made before the rebuild happens are coalesced.
+        """
+        from PySide6 import QtCore
+
+        if self._menu_rebuild_pending:
+            return
+
+        self._menu_rebuild_pending = True
+        QtCore.QTimer.singleShot(0, self._rebuild_menu)
+
+    def _rebuild_menu(self):
+        """
+        Rebuilds the ShotGrid menu if a rebuild is still pending.
+        """
+        if not self._menu_rebuild_pending:
+            # The engine was destroyed in the meantime
+            return
+
+        self._menu_rebuild_pending = False
         self.menu_generator.setup_menu_items()
 
     def _run_app_instance_commands(self):
@@ -137,18 +259,18 @@ class SubstancePainterEngine(Engine):
         of the environment configuration yaml file.
         """
 
+        log_debug = self.logger.debug
+        log_warning = self.logger.warning
+
         # Build a dictionary mapping app instance names to dictionaries of
-        # commands they registered with the engine.
-        app_instance_commands = {}
+        # 'command name: command function' they registered with the engine.
+        app_instance_commands = defaultdict(dict)
         for command_name, value in self.commands.items():
             app_instance = value["properties"].get("app")
             if app_instance:
-                # Add entry 'command name: command function' to the command
-                # dictionary of this app instance.
-                command_dict = app_instance_commands.setdefault(
-                    app_instance.instance_name, {}
-                )
-                command_dict[command_name] = value["callback"]
+                app_instance_commands[app_instance.instance_name][command_name] = value[
+                    "callback"
+                ]
 
         # Run the series of app instance commands listed in the 'run_at_startup' setting.
         for app_setting_dict in self.get_setting("run_at_startup", []):
@@ -160,47 +282,44 @@ class SubstancePainterEngine(Engine):
             command_dict = app_instance_commands.get(app_instance_name)
 
             if command_dict is None:
-                self.logger.warning(
+                log_warning(
                     "%s configuration setting 'run_at_startup' requests app '%s' that is not installed.",
                     self.name,
                     app_instance_name,
                 )
+            elif not setting_command_name:
+                # Run all commands of the given app instance.
+                for command_name, command_function in command_dict.items():
+                    log_debug(
+                        "%s startup running app '%s' command '%s'.",
+                        self.name,
+                        app_instance_name,
+                        command_name,
+                    )
+                    command_function()
             else:
-                if not setting_command_name:
-                    # Run all commands of the given app instance.
-                    for command_name, command_function in command_dict.items():
-                        self.logger.debug(
-                            "%s startup running app '%s' command '%s'.",
-                            self.name,
-                            app_instance_name,
-                            command_name,
-                        )
-                        command_function()
+                # Run the command whose name is listed in the 'run_at_startup' setting.
+                # Run this command once Maya will have completed its UI update and be idle
+                # in order to run it after the ones that restore the persisted Shotgun app panels.
+                command_function = command_dict.get(setting_command_name)
+                if command_function:
+                    log_debug(
+                        "%s startup running app '%s' command '%s'.",
+                        self.name,
+                        app_instance_name,
+                        setting_command_name,
+                    )
+                    command_function()
                 else:
-                    # Run the command whose name is listed in the 'run_at_startup' setting.
-                    # Run this command once Maya will have completed its UI update and be idle
-                    # in order to run it after the ones that restore the persisted Shotgun app panels.
-                    command_function = command_dict.get(setting_command_name)
-                    if command_function:
-                        self.logger.debug(
-                            "%s startup running app '%s' command '%s'.",
-                            self.name,
-                            app_instance_name,
-                            setting_command_name,
-                        )
-                        command_function()
-                    else:
-                        known_commands = ", ".join(
-                            "'%s'" % name for name in command_dict
-                        )
-                        self.logger.warning(
-                            "%s configuration setting 'run_at_startup' requests app '%s' unknown command '%s'. "
-                            "Known commands: %s",
-                            self.name,
-                            app_instance_name,
-                            setting_command_name,
-                            known_commands,
-                        )
+                    known_commands = ", ".join("'%s'" % name for name in command_dict)
+                    log_warning(
+                        "%s configuration setting 'run_at_startup' requests app '%s' unknown command '%s'. "
+                        "Known commands: %s",
+                        self.name,
+                        app_instance_name,
+                        setting_command_name,
+                        known_commands,
+                    )
 
     def destroy_engine(self):
         """
@@ -209,11 +328,16 @@ class SubstancePainterEngine(Engine):
 
         self.logger.debug(f"{self}: Destroying...")
 
+        # Cancel any scheduled menu rebuild
+        self._menu_rebuild_pending = False
+
         # Unregister the callbacks
-        self.callback_handler.unregister_callbacks()
+        if self._callback_handler is not None:
+            self._callback_handler.unregister_callbacks()
 
         # Destroy the menu
-        self.menu_generator.destroy_menu()
+        if self._menu_generator is not None:
+            self._menu_generator.destroy_menu()
 
     ##########################################################################################
     # ui
@@ -250,6 +374,8 @@ class SubstancePainterEngine(Engine):
         dialog.activateWindow()
 
         if sgtk.util.is_windows():
+            import ctypes
+
             # special case to get windows to raise the dialog
             ctypes.windll.user32.SetActiveWindow(dialog.winId())
 
@@ -259,18 +385,27 @@ class SubstancePainterEngine(Engine):
         """
         Override show_modal to handle Substance Painter's event loop properly.
         """
-        # from PySide6 import QtWidgets
-        from sgtk.platform.qt import QtCore, QtGui
+        from PySide6 import QtWidgets
 
-        # Reset cursor before showing dialog
-        while QtWidgets.QApplication.overrideCursor():
-            QtWidgets.QApplication.restoreOverrideCursor()
+        # Reset cursor before showing dialog.
+        # The number of iterations is bounded so that an unexpected state of
+        # Qt's override cursor stack can never lock the UI in an infinite loop.
+        override_cursor = QtWidgets.QApplication.overrideCursor
+        restore_override_cursor = QtWidgets.QApplication.restoreOverrideCursor
+        for _ in range(_MAX_OVERRIDE_CURSORS):
+            if override_cursor() is None:
+                break
+            restore_override_cursor()
 
         dialog, widget = self._create_dialog_with_widget(
             title, bundle, widget_class, *args, **kwargs
         )
 
-        dialog.parent().setStyleSheet(dialog.parent().styleSheet())
+        # Re-applying the parent stylesheet forces Qt to restyle the newly
+        # parented dialog
+        parent_widget = dialog.parent()
+        if parent_widget is not None:
+            parent_widget.setStyleSheet(parent_widget.styleSheet())
 
         # finally launch it, modal state
         status = dialog.exec_()
@@ -291,24 +426,32 @@ class SubstancePainterEngine(Engine):
         :returns: the created widget_class instance
         """
 
+        import substance_painter as sp
+
         self.logger.debug(f"Begin showing panel {panel_id}")
 
         # Create a unique widget ID based on the panel_id
         widget_id = f"sgtk_{panel_id}"
 
         # Check if we already have a dock widget for this panel
-        if panel_id in self._dock_widgets:
+        dock_widget = self._dock_widgets.get(panel_id)
+        if dock_widget is not None:
             self.logger.debug(f"Found existing dock widget for {panel_id}")
-            dock_widget = self._dock_widgets[panel_id]
 
-            # Show and raise the dock widget
-            dock_widget.show()
-            dock_widget.raise_()
+            try:
+                # Show and raise the dock widget
+                dock_widget.show()
+                dock_widget.raise_()
 
-            # Get the widget instance from the dock widget
-            widget_instance = dock_widget.widget()
+                # Get the widget instance from the dock widget
+                widget_instance = dock_widget.widget()
 
-            return widget_instance
+                return widget_instance
+
+            except RuntimeError:
+                # The underlying C++ object has been deleted by Qt
+                self.logger.debug(f"Dock widget for {panel_id} was deleted")
+                self._dock_widgets.pop(panel_id, None)
 
         # If widget doesn't exist, create it
         self.logger.debug(f"Creating new widget {widget_id}")
@@ -323,11 +466,7 @@ class SubstancePainterEngine(Engine):
         widget_instance.setWindowTitle(title)
         widget_instance.setParent(parent)
 
-        sg_panel_icon = os.path.join(
-            self.disk_location, "resources", "icons", "shotgrid.png"
-        )
-        icon = QtGui.QIcon(sg_panel_icon)
-        widget_instance.setWindowIcon(icon)
+        widget_instance.setWindowIcon(self._sg_panel_icon)
 
         # Apply external stylesheet if provided by the bundle
         self._apply_external_styleshet(bundle, widget_instance)
@@ -340,8 +479,13 @@ class SubstancePainterEngine(Engine):
         dock_widget.show()
         dock_widget.raise_()
 
-        # Store the dock widget reference
+        # Store the dock widget reference, and forget about it once Qt destroys it.
+        # A strong reference is required: the Python wrapper would otherwise be
+        # garbage collected while the dock widget still exists in Substance Painter.
         self._dock_widgets[panel_id] = dock_widget
+        dock_widget.destroyed.connect(
+            lambda *args, panel_id=panel_id: self._dock_widgets.pop(panel_id, None)
+        )
 
         self.logger.debug(f"Panel {panel_id} docked successfully")
 
@@ -357,11 +501,41 @@ class SubstancePainterEngine(Engine):
 
         return self.get_template("textures_export_work_area")
 
+    def get_texture_export_work_area_path(self, context):
+        """
+        Returns the textures export work area resolved for the given context,
+        converted to a mapped network drive path on Windows.
+        Returns None if the template is not configured.
+
+        The paths are cached per context entities (project, entity, step and
+        task), resolving the context fields may query ShotGrid.
+
+        :param context: The context to resolve the work area for
+        """
+        export_area_template = self.get_texture_export_work_area_template()
+        if not export_area_template:
+            return None
+
+        cache_key = tuple(
+            (entity["type"], entity["id"]) if entity else None
+            for entity in (context.project, context.entity, context.step, context.task)
+        )
+        export_path = self._export_work_area_paths.get(cache_key)
+        if export_path is None:
+            fields = context.as_template_fields(export_area_template)
+            export_path = self.convert_unc_path_to_mapped_drive_path(
+                export_area_template.apply_fields(fields)
+            )
+            self._export_work_area_paths[cache_key] = export_path
+        return export_path
+
     def convert_unc_path_to_mapped_drive_path(self, filepath):
         """
         Converts the UNC path to a mapped network drive path
         Only applies to Windows
         """
+        if not _IS_WINDOWS:
+            return filepath
 
         return self.tk_substancepainter.utils._convert_unc_path_to_mapped_drive_path(
             self, filepath
@@ -372,6 +546,8 @@ class SubstancePainterEngine(Engine):
         Converts the mapped network drive path to a UNC path
         Only applies to Windows
         """
+        if not _IS_WINDOWS:
+            return filepath
 
         return self.tk_substancepainter.utils._convert_mapped_drive_path_to_unc_path(
             self, filepath
@@ -385,19 +561,34 @@ class SubstancePainterEngine(Engine):
         template and before saving, the sp.project.file_path() returns the path of
         the template. In that case we consider the file path as being None
         """
+        import substance_painter as sp
 
         if not sp.project.is_open():
             return None
 
         project_path = sp.project.file_path()
 
-        _, extension = os.path.splitext(project_path)
+        cached_project_path, cached_result = self._project_path_cache
+        if project_path == cached_project_path:
+            return cached_result
 
-        if extension == ".spt":
-            return None
+        if project_path.endswith(".spt"):
+            result = None
 
         else:
-            return self.convert_mapped_drive_path_to_unc_path(project_path)
+            result = self.convert_mapped_drive_path_to_unc_path(project_path)
+
+        self._project_path_cache = (project_path, result)
+
+        return result
+
+    def clear_project_path_cache(self):
+        """
+        Forget the project path cached by get_project_path()
+        Called when the Substance Painter project is closed, and when the
+        context changes as the drive mappings may differ.
+        """
+        self._project_path_cache = (None, None)
 
     #####################################################################################
     # Logging
@@ -411,30 +602,59 @@ class SubstancePainterEngine(Engine):
         :param record: Std python logging record
         :type record: :class:`~python.logging.LogRecord`
         """
+        import substance_painter as sp
 
-        # msg = handler.format(record)
+        level = record.levelno
+        if level < self._sp_min_level:
+            return
 
-        formatter = logging.Formatter("%(message)s")
+        # msg = handler.format(record)
 
-        msg = formatter.format(record)
+        msg = self._log_formatter.format(record)
 
-        if record.levelno >= logging.ERROR:
+        if level >= logging.ERROR:
             fct = self._show_error_dialog
-        elif record.levelno >= logging.WARNING:
+        elif level >= logging.WARNING:
             fct = self._show_warning_dialog
         else:
             fct = sp.logging.info
 
         # Sends the message to the script editor.
-        self.async_execute_in_main_thread(fct, msg)
+        # Messages are queued and sent in batches, so that a burst of messages
+        # only requires a single hop to the main thread.
+        self._log_queue.append((fct, msg))
+        with self._log_flush_lock:
+            if self._log_flush_pending:
+                return
+            self._log_flush_pending = True
+
+        self.async_execute_in_main_thread(self._flush_log_queue)
+
+    def _flush_log_queue(self):
+        """
+        Sends all the queued log messages to Substance Painter.
+        Must be called from the main thread.
+        """
+        with self._log_flush_lock:
+            self._log_flush_pending = False
+
+        while self._log_queue:
+            fct, msg = self._log_queue.popleft()
+            fct(msg)
 
     def _show_warning_dialog(self, message):
+        import substance_painter as sp
+        from PySide6 import QtWidgets
+
         sp.logging.warning(message)
         QtWidgets.QMessageBox.warning(
             self.substance_main_window, "ShotGrid Warning", message
         )
 
     def _show_error_dialog(self, message):
+        import substance_painter as sp
+        from PySide6 import QtWidgets
+
         sp.logging.error(message)
         QtWidgets.QMessageBox.critical(
             self.substance_main_window, "ShotGrid Error", message
@@ -22,6 +22,7 @@ __contact__ = "https://www.linkedin.com/in/donat-van-bellinghen"
 __credits__ = ["Diego Garcia Huerta", "Donat Van Bellinghen"]
 
 
+import functools
 import os
 
 import sgtk
@@ -32,6 +33,13 @@ HookBaseClass = sgtk.get_hook_baseclass()
 
 SESSION_PUBLISH_TYPE = "Substance Painter Project File"
 
+# icons displayed for the collected items, resolved once at import
+_ICONS_DIR = os.path.realpath(
+    os.path.join(os.path.dirname(__file__), os.pardir, "icons")
+)
+_SESSION_ICON = os.path.join(_ICONS_DIR, "substance_painter_icon.png")
+_TEXTURE_SET_ICON = os.path.join(_ICONS_DIR, "texture_set_icon.png")
+
 
 class SubstancePainterSessionCollector(HookBaseClass):
     """
@@ -39,7 +47,26 @@ class SubstancePainterSessionCollector(HookBaseClass):
 
     """
 
-    @property
+    # settings specific to this collector
+    _SESSION_SETTINGS = {
+        "Work Template": {
+            "type": "template",
+            "default": None,
+            "description": "Template path for artist work files. Should "
+            "correspond to a template defined in "
+            "templates.yml. If configured, is made available"
+            "to publish plugins via the collected item's "
+            "properties. ",
+        },
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Templates resolved by name, see _get_template()
+        self._template_cache = {}
+
+    @functools.cached_property
     def settings(self):
         """
         Dictionary defining the settings that this collector expects to receive
@@ -57,28 +84,12 @@ class SubstancePainterSessionCollector(HookBaseClass):
 
         The type string should be one of the data types that toolkit accepts as
         part of its environment configuration.
-        """
-
-        # grab any base class settings
-        collector_settings = super().settings or {}
-
-        # settings specific to this collector
-        substancepainter_session_settings = {
-            "Work Template": {
-                "type": "template",
-                "default": None,
-                "description": "Template path for artist work files. Should "
-                "correspond to a template defined in "
-                "templates.yml. If configured, is made available"
-                "to publish plugins via the collected item's "
-                "properties. ",
-            },
-        }
 
-        # update the base settings with these settings
-        collector_settings.update(substancepainter_session_settings)
+        The settings are static, so the dictionary is only built once.
+        """
 
-        return collector_settings
+        # base class settings, updated with the settings specific to this collector
+        return {**(super().settings or {}), **self._SESSION_SETTINGS}
 
     def process_current_session(self, settings, parent_item):
         """
@@ -88,19 +99,19 @@ class SubstancePainterSessionCollector(HookBaseClass):
         :param dict settings: Configured settings for this collector
         :param parent_item: Root item instance
         """
-        publisher = self.parent
-        engine = publisher.engine
-
         # First, create an item representing the current Substance 3D Painter session file.
         session_item = self.collect_current_substancepainter_session(
             settings, parent_item
         )
 
         # Create an item for each texture set
-        all_texture_sets = sp.textureset.all_texture_sets()
+        # Items are created serially: the publish tree is not thread safe.
+        # All the items share the same icon file, which Qt only decodes once
+        # thanks to its pixmap cache, so there is no per item icon I/O to overlap.
+        create_texture_set_export_item = self.create_texture_set_export_item
 
-        for texture_set in all_texture_sets:
-            self.create_texture_set_export_item(settings, session_item, texture_set)
+        for texture_set in sp.textureset.all_texture_sets():
+            create_texture_set_export_item(settings, session_item, texture_set)
 
     def collect_current_substancepainter_session(self, settings, parent_item):
         """
@@ -131,17 +142,11 @@ class SubstancePainterSessionCollector(HookBaseClass):
             display_name,
         )
 
-        # get the icon path to display for this item
-        icon_path = os.path.join(
-            self.disk_location, os.pardir, "icons", "substance_painter_icon.png"
-        )
-        session_item.set_icon_from_path(icon_path)
+        session_item.set_icon_from_path(_SESSION_ICON)
 
         work_template_setting = settings.get("Work Template")
 
-        work_template = publisher.engine.get_template_by_name(
-            work_template_setting.value
-        )
+        work_template = self._get_template(work_template_setting.value)
 
         # store the template on the item for use by publish plugins. we
         # can't evaluate the fields here because there's no guarantee the
@@ -165,10 +170,21 @@ class SubstancePainterSessionCollector(HookBaseClass):
         # Store the sp texture set (type: substance_painter.textureset.TextureSet) on the item
         item.properties["texture_set"] = texture_set
 
-        # get the icon path to display for this item
-        icon_path = os.path.join(
-            self.disk_location, os.pardir, "icons", "texture_set_icon.png"
-        )
-        item.set_icon_from_path(icon_path)
+        item.set_icon_from_path(_TEXTURE_SET_ICON)
 
         return item
+
+    def _get_template(self, template_name):
+        """
+        Returns the template with the given name, resolving it through the
+        engine only the first time it is requested.
+
+        :param str template_name: Name of the template, as defined in templates.yml
+        :returns: The template or None
+        """
+        if template_name not in self._template_cache:
+            self._template_cache[template_name] = (
+                self.parent.engine.get_template_by_name(template_name)
+            )
+
+        return self._template_cache[template_name]
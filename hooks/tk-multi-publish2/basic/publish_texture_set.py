@@ -25,13 +25,16 @@ __credits__ = ["Diego Garcia Huerta", "Donat Van Bellinghen"]
 import os
 import pprint
 import re
+import shutil
+import sys
 import tempfile
 import traceback
+from collections import ChainMap, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 import sgtk
 import substance_painter as sp
-from sgtk.platform.qt import QtCore, QtGui
-from sgtk.util.filesystem import copy_file, ensure_folder_exists
+from sgtk.util.filesystem import ensure_folder_exists
 
 HookBaseClass = sgtk.get_hook_baseclass()
 
@@ -40,17 +43,50 @@ TEXTURE_PUBLISH_TYPE = "Texture"
 
 TEXTURE_SET_PUBLISH_TYPE = "Texture Set"
 
+# The parentheses are part of the preset filename: '(.$udim)' is the optional
+# UDIM section of the Substance Painter export presets
 TEXTURE_ABSTRACT_PATH_REGEX = re.compile(
-    "\$textureSet_[A-Za-z0-9]+_\$colorSpace\(\.\$udim\)"
+    r"\$textureSet_[A-Za-z0-9]+_\$colorSpace\(\.\$udim\)"
 )
 
 # texture filename regex : needs to match the export preset in the 'shotgrid' export preset
 # assuming it should be : '$textureSet_<MapName>_$colorSpace(.$udim)'
 # no underscore is allowed in the <MapName>
 TEXTURE_FILENAME_REGEX = re.compile(
-    "[^.]+_(?P<texture_map>[^_.]+)_(?P<colorspace>[^_.]+)(?:\.(?P<udim>\d{4}))?\.(?P<extension>\w+$)"
+    r"[^.]+_(?P<texture_map>[^_.]+)_(?P<colorspace>[^_.]+)(?:\.(?P<udim>\d{4}))?\.(?P<extension>\w+)\Z"
 )
 
+# Maximum width and height of the generated thumbnails
+THUMBNAIL_SIZE = 512
+
+# Texture maps (lower case) preferred to generate the texture set thumbnail
+THUMBNAIL_TEXTURE_MAPS = ("basecolor", "albedo", "diffuse")
+
+# Matches the UDIM number (e.g. .1001) before the extension of a texture filename
+UDIM_SUB_REGEX = re.compile(r"\.\d+(\.\w+)$")
+
+# Permissions of the published texture files, same as sgtk's copy_file().
+# They are set with os.chmod(): sgtk's copy_file() and ensure_folder_exists()
+# temporarily clear the process wide umask, which the publish workers must not
+# do while Substance Painter exports the next textures on the main thread.
+_PUBLISH_FILE_PERMISSIONS = 0o666
+
+# Folder of the generated thumbnails: RAM backed on Linux, the thumbnails are
+# only written to be uploaded, and deleted once the publish is registered.
+# None uses the default temp folder.
+_THUMBNAIL_DIR = (
+    "/dev/shm"
+    if sys.platform.startswith("linux") and os.access("/dev/shm", os.W_OK)
+    else None
+)
+
+# Buffer size of the copies falling back to user space
+_BUFFERED_COPY_SIZE = 1024 * 1024
+
+# Kernel side copies (Linux 4.5+): no data goes through user space, and the
+# filesystem can even clone the file (reflinks, NFS/SMB server side copies)
+_HAS_COPY_FILE_RANGE = hasattr(os, "copy_file_range")
+
 
 class SubstancePainterTextureExportPlugin(HookBaseClass):
     """
@@ -61,6 +97,17 @@ class SubstancePainterTextureExportPlugin(HookBaseClass):
 
     """
 
+    # The export preset info image, loaded the first time the warning is shown
+    _cached_warning_pixmap = None
+
+    # The OpenImageIO module, imported the first time a thumbnail is generated
+    # (False if it is not available)
+    _oiio = None
+
+    # (from, to) color spaces of the thumbnail color conversion, resolved from
+    # the color config the first time a thumbnail is generated
+    _thumbnail_color_spaces = None
+
     @property
     def description(self):
         """
@@ -129,6 +176,12 @@ class SubstancePainterTextureExportPlugin(HookBaseClass):
                 "correspond to a template defined in "
                 "templates.yml.",
             },
+            "Publish Workers": {
+                "type": "int",
+                "default": 8,
+                "description": "Maximum number of texture maps copied and registered "
+                "in parallel.",
+            },
             "ShotGrid Export Preset index": {
                 "type": "int",
                 "default": 0,
@@ -190,20 +243,12 @@ class SubstancePainterTextureExportPlugin(HookBaseClass):
 
         # Get all the resource export presets from Substance Painter
         # NOTE: Assuming we have presets whose name starts with "shotgrid"
-        resource_presets = sp.export.list_resource_export_presets()
-        shotgrid_export_presets = []
-
-        counter = 0
-        for resource_preset in resource_presets:
-            if resource_preset.resource_id.name.lower().startswith("shotgrid"):
-                shotgrid_export_presets.append(
-                    {
-                        "name": resource_preset.resource_id.name,
-                        "preset": resource_preset,
-                        "index": counter,
-                    }
-                )
-                counter += 1
+        shotgrid_export_presets = [
+            {"name": preset_name, "preset": resource_preset, "index": index}
+            for index, (preset_name, resource_preset) in enumerate(
+                self._get_shotgrid_presets(item)
+            )
+        ]
 
         if not shotgrid_export_presets:
             self.logger.warning(
@@ -215,12 +260,40 @@ class SubstancePainterTextureExportPlugin(HookBaseClass):
             return {"accepted": False, "checked": False}
 
         settings["ShotGrid Export Presets list"].value = shotgrid_export_presets
+        # Index the presets so validate() doesn't have to search the list
+        item.properties["_preset_by_index"] = {
+            preset_dict["index"]: preset_dict["preset"]
+            for preset_dict in shotgrid_export_presets
+        }
 
         self.logger.info(
             f"Substance Painter '{self.name}' plugin accepted to publish textures."
         )
         return {"accepted": True, "checked": True}
 
+    def _get_shotgrid_presets(self, item):
+        """
+        List the resource export presets whose name starts with "shotgrid".
+
+        Listing the presets walks the Substance Painter resource shelves, so the
+        result is shared by the texture set items of a same collection, on their
+        parent item. The items, and the listing, are rebuilt by each collection,
+        so an edited preset is picked up on the next one.
+
+        :param item: Texture set item being accepted
+        :returns: Tuple of (preset name, resource export preset) tuples
+        """
+        shared_item = item.parent or item
+        shotgrid_presets = shared_item.properties.get("_shotgrid_export_presets")
+        if shotgrid_presets is None:
+            shotgrid_presets = tuple(
+                (resource_preset.resource_id.name, resource_preset)
+                for resource_preset in sp.export.list_resource_export_presets()
+                if resource_preset.resource_id.name.lower().startswith("shotgrid")
+            )
+            shared_item.properties["_shotgrid_export_presets"] = shotgrid_presets
+        return shotgrid_presets
+
     def validate(self, settings, item):
         """
         Validates the given item to check that it is ok to publish. Returns a
@@ -241,59 +314,59 @@ class SubstancePainterTextureExportPlugin(HookBaseClass):
         engine = publisher.engine
 
         # Set the chosen export preset on the item
-        for preset_dict in settings["ShotGrid Export Presets list"].value:
-            if preset_dict["index"] == settings["ShotGrid Export Preset index"].value:
-                item.properties["export_preset"] = preset_dict["preset"]
+        item.properties["export_preset"] = item.properties["_preset_by_index"][
+            settings["ShotGrid Export Preset index"].value
+        ]
 
         # Need to check that the export preset is correct, matching our
         # convention of '$textureSet_<MapName>_$colorSpace(.$udim)'
         # Note : underscores are NOT allowed in the <MapName>
-        maps = item.properties["export_preset"].list_output_maps()
-        for mp in maps:
-            map_filename = mp["fileName"]
-            match = TEXTURE_ABSTRACT_PATH_REGEX.match(map_filename)
-            if not match:
-                self.logger.error(
-                    f"Issue with the export preset: {item.properties['export_preset'].resource_id.name}"
-                )
-                self.logger.error(
-                    f"The export filename: {map_filename} is not matching the requirements. "
-                )
-                self.logger.error(
-                    "It should match the pattern : '$textureSet_<MapNameNoUnderscores>_$colorSpace(.$udim)'"
-                )
+        # The preset is listed again on each validation: it may have been
+        # fixed since the last one
+        output_maps = item.properties["export_preset"].list_output_maps()
+
+        match_abstract_path = TEXTURE_ABSTRACT_PATH_REGEX.fullmatch
+        bad_map_filenames = [
+            mp["fileName"]
+            for mp in output_maps
+            if not match_abstract_path(mp["fileName"])
+        ]
+        if bad_map_filenames:
+            self.logger.error(
+                f"Issue with the export preset: {item.properties['export_preset'].resource_id.name}"
+            )
+            self.logger.error(
+                "The export filenames: %s are not matching the requirements. "
+                % ", ".join(bad_map_filenames)
+            )
+            self.logger.error(
+                "It should match the pattern : '$textureSet_<MapNameNoUnderscores>_$colorSpace(.$udim)'"
+            )
 
-                self.logger.error(
-                    "Export preset validation failed",
-                    extra={
-                        "action_button": {
-                            "label": "Copy Path",
-                            "tooltip": "Copy correct path",
-                            "callback": lambda: QtGui.QApplication.clipboard().setText(
-                                "$textureSet_<MapNameNoUnderscores>_$colorSpace(.$udim)"
-                            ),
-                        }
-                    },
-                )
+            self.logger.error(
+                "Export preset validation failed",
+                extra={
+                    "action_button": {
+                        "label": "Copy Path",
+                        "tooltip": "Copy correct path",
+                        "callback": lambda: QtGui.QApplication.clipboard().setText(
+                            "$textureSet_<MapNameNoUnderscores>_$colorSpace(.$udim)"
+                        ),
+                    }
+                },
+            )
 
-                self._show_preset_warning_dialog(
-                    item.properties["export_preset"].resource_id.name
-                )
+            self._show_preset_warning_dialog(
+                item.properties["export_preset"].resource_id.name
+            )
 
-                # QtWidgets.QMessageBox.warning(None,"ShotGrid Warning", "It should match the pattern : '$textureSet_<MapNameNoUnderscores>_$colorSpace(.$udim)'")
+            # QtWidgets.QMessageBox.warning(None,"ShotGrid Warning", "It should match the pattern : '$textureSet_<MapNameNoUnderscores>_$colorSpace(.$udim)'")
 
-                return False
+            return False
 
         # Work area for exported textures:
-        work_export_path = ""
-        export_area_template = engine.get_texture_export_work_area_template()
-        if export_area_template:
-            fields = publisher.context.as_template_fields(export_area_template)
-            work_export_path = export_area_template.apply_fields(fields)
-            work_export_path = engine.convert_unc_path_to_mapped_drive_path(
-                work_export_path
-            )
-        else:
+        work_export_path = engine.get_texture_export_work_area_path(publisher.context)
+        if work_export_path is None:
             self.logger.error("Couldn't find the export area template from the engine")
             return False
 
@@ -336,31 +409,7 @@ class SubstancePainterTextureExportPlugin(HookBaseClass):
         :param item: Item to process
         """
 
-        publisher = self.parent
-
-        # Order Substance Painter to export the textures
-        # This will export the textures without in a work folder
-        # possibly overwriting previous exports
-        export_result = sp.export.export_project_textures(
-            item.properties["export_config"]
-        )
-
-        # In case of error, display a human readable message:
-        if export_result.status != sp.export.ExportStatus.Success:
-            self.logger.error(export_result.message)
-
-        # Create a list to hold all texture filepaths
-        exported_textures = []
-
-        for k, v in export_result.textures.items():
-            self.logger.info(f"Export Stack {k}:")
-            for exported in v:
-                exported_textures.append(exported)
-                self.logger.info(f"Exported texure: {exported}")
-
-        # Group texture paths by map type:
-        # if using UDIMs, all UDIMs of the same map will be grouped together
-        grouped_texture_paths = self._group_texture_sequences(exported_textures)
+        export_config = item.properties["export_config"]
 
         # Use the version number from the publish data of the substance project
         # that was previously published
@@ -374,91 +423,131 @@ class SubstancePainterTextureExportPlugin(HookBaseClass):
                 item.parent.properties.sg_publish_data["id"]
             )
 
-        # Empty list that will hold the publish id of each published texture
-        textures_publish_ids = []
-
-        # Now we can publish each texture file group
-        for grouped_texture_path in grouped_texture_paths:
-            # If the 'grouped_texture_path' list contains a single filepath
-            # it means we have no UDIMs
-            if len(grouped_texture_path) == 1:
-                publish_template_setting = settings.get("Publish Template")
-            else:  # we have multiple files, meaning UDIMs are used
-                publish_template_setting = settings.get("Publish UDIM Template")
-            texture_publish_template = publisher.engine.get_template_by_name(
-                publish_template_setting.value
+        # Resolve the publish templates and their context fields once for all
+        # the texture files, keyed by whether the texture files use UDIMs
+        publisher = self.parent
+        publish_templates = {}
+        for use_udims, template_setting_name in (
+            (False, "Publish Template"),
+            (True, "Publish UDIM Template"),
+        ):
+            publish_template = publisher.engine.get_template_by_name(
+                settings[template_setting_name].value
             )
+            base_fields = None
+            if publish_template:
+                # Fields : start by getting the common fields from the context
+                base_fields = publisher.context.as_template_fields(publish_template)
+                base_fields["version"] = item.properties["version_number"]
+                base_fields["texture_set"] = item.properties["texture_set_name"]
+            publish_templates[use_udims] = (publish_template, base_fields)
+
+        # Pipeline the export with the copy of the textures:
+        # Substance Painter's API has to be called from the main thread, so the
+        # textures are exported here one stack (root path) at a time, while the
+        # texture files of the stacks already exported are copied by the workers.
+        # The workers only copy the files: the publish paths are resolved and
+        # their folders created here, between the exports, and the publishes are
+        # registered and logged from the main thread, as the publisher's log
+        # handler builds Qt widgets.
+        # (copy future, abstract publish path, publish name), in the export order
+        copy_futures = []
+        # Publish folders already created: all the texture maps of a set usually
+        # land in the same one
+        ensured_dirs = set()
+        # A single thumbnail is generated for the whole texture set: the texture
+        # maps of a set don't make meaningfully different previews
+        thumb_path = None
+        thumbnail_generated = False
+        with ThreadPoolExecutor(
+            max_workers=max(1, settings["Publish Workers"].value)
+        ) as executor:
+            for export_entry in export_config["exportList"]:
+                # Order Substance Painter to export the textures
+                # This will export the textures without in a work folder
+                # possibly overwriting previous exports
+                export_result = sp.export.export_project_textures(
+                    dict(export_config, exportList=[export_entry])
+                )
 
-            # Fields : start by getting the common fields from the context
-            fields = publisher.context.as_template_fields(texture_publish_template)
-            fields["version"] = item.properties["version_number"]
-
-            # We are not using a work template for the textures because, AFAIK
-            # there is no way to fully customize the substance export system
-            # Instead, we extract the rest of the fields by analyzing the file paths,
-            # assuming we exported using a predefined 'shotgrid' export
-            for texture_path in grouped_texture_path:
-                filename = os.path.basename(texture_path)
-                match = re.match(TEXTURE_FILENAME_REGEX, filename)
-                fields["texture_set"] = item.properties["texture_set_name"]
-                fields["texture_map"] = match.group("texture_map")
-                fields["colorspace"] = match.group("colorspace")
-                fields["extension"] = match.group("extension")
-                if match.group("udim"):
-                    fields["UDIM"] = int(match.group("udim"))
-
-                texture_publish_file = texture_publish_template.apply_fields(fields)
-
-                # Copy (and rename) each texture file to the publish destination
-                try:
-                    ensure_folder_exists(os.path.dirname(texture_publish_file))
-                    copy_file(texture_path, texture_publish_file)
-                except Exception:
-                    raise Exception(
-                        "Failed to copy work file from '%s' to '%s'.\n%s"
-                        % (texture_path, texture_publish_file, traceback.format_exc())
-                    )
-
-            # Construct the (abstract) publish path
-            fields.pop("UDIM", None)
-            texture_publish_path = texture_publish_template.apply_fields(fields)
-
-            # Create the publish name
-            publish_name = f"{fields['Asset']}_{fields['task_name']}_{item.properties['texture_set_name']}_{fields['texture_map']}"
-
-            publish_data = {
-                "tk": publisher.sgtk,
-                "context": item.context,
-                "comment": item.description,
-                "path": texture_publish_path,
-                "name": publish_name,
-                "version_number": item.properties["version_number"],
-                "published_file_type": TEXTURE_PUBLISH_TYPE,
-                "dependency_ids": publish_dependencies_ids,
-            }
+                # In case of error, display a human readable message:
+                if export_result.status != sp.export.ExportStatus.Success:
+                    self.logger.error(export_result.message)
+
+                # Flatten the texture filepaths of all the exported stacks
+                exported_textures = [
+                    exported
+                    for stack_textures in export_result.textures.values()
+                    for exported in stack_textures
+                ]
+                # A single info line per export: with UDIMs there can be
+                # hundreds of files, only listed in the debug output
+                self.logger.info(
+                    f"Exported {len(exported_textures)} textures across "
+                    f"{len(export_result.textures)} stacks"
+                )
+                self.logger.debug("Exported textures: %s", exported_textures)
 
-            # Try to generate a thumbnail from the first file in the group
-            thumb_path = self._generate_thumbnail(grouped_texture_path[0])
-            if thumb_path:
-                publish_data["thumbnail_path"] = thumb_path
+                # Group texture paths by map type:
+                # if using UDIMs, all UDIMs of the same map will be grouped together
+                grouped_texture_paths = self._group_texture_sequences(
+                    exported_textures
+                )
 
-            sg_publish_data = sgtk.util.register_publish(**publish_data)
-            self.logger.info("Texture Publish registered!")
-            self.logger.debug(
-                "ShotGrid Publish data...",
-                extra={
-                    "action_show_more_info": {
-                        "label": "ShotGrid Publish Data",
-                        "tooltip": "Show the complete ShotGrid Publish Entity dictionary",
-                        "text": "<pre>%s</pre>" % (pprint.pformat(sg_publish_data),),
-                    }
-                },
-            )
+                if not thumbnail_generated and grouped_texture_paths:
+                    thumb_path = self._generate_thumbnail(
+                        self._get_thumbnail_source_path(grouped_texture_paths)
+                    )
+                    thumbnail_generated = True
+                    item.properties["_cached_thumb_path"] = thumb_path
+
+                for grouped_texture_path in grouped_texture_paths:
+                    (
+                        texture_copies,
+                        texture_publish_path,
+                        publish_name,
+                    ) = self._prepare_texture_group(
+                        item, grouped_texture_path, publish_templates, ensured_dirs
+                    )
+                    copy_futures.append(
+                        (
+                            executor.submit(self._copy_texture_files, texture_copies),
+                            texture_publish_path,
+                            publish_name,
+                        )
+                    )
 
-            # TODO check conflicting publishes somewhere....
+            # Register the texture publishes in the export order, as their
+            # copies complete. A copy failure is raised when it is reached.
+            textures_publish_ids = []
+            for future, texture_publish_path, publish_name in copy_futures:
+                for copy_message in future.result():
+                    self.logger.debug(copy_message)
+                textures_publish_ids.append(
+                    self._register_texture_publish(
+                        item,
+                        texture_publish_path,
+                        publish_name,
+                        publish_dependencies_ids,
+                    )
+                )
 
-            # Store the id of the registered texture publish
-            textures_publish_ids.append(sg_publish_data["id"])
+        # The texture publishes share the texture set thumbnail: upload it once
+        # for all of them, instead of once per register_publish call
+        if thumb_path and textures_publish_ids:
+            try:
+                self.parent.shotgun.share_thumbnail(
+                    [
+                        {"type": "PublishedFile", "id": publish_id}
+                        for publish_id in textures_publish_ids
+                    ],
+                    thumbnail_path=thumb_path,
+                )
+            except Exception:
+                self.logger.warning(
+                    "Failed to upload the thumbnail of the texture publishes.\n%s"
+                    % traceback.format_exc()
+                )
 
         # Store all the registered publish ids on the item properties
         item.properties["textures_publish_ids"] = textures_publish_ids
@@ -503,12 +592,18 @@ class SubstancePainterTextureExportPlugin(HookBaseClass):
             "path": set_publish_path,
             "name": set_publish_name,
             "version_number": item.properties["version_number"],
-            "thumbnail_path": item.get_thumbnail_as_path(),
+            # Fallback to the thumbnail generated for the texture publishes
+            "thumbnail_path": item.get_thumbnail_as_path()
+            or item.properties.get("_cached_thumb_path"),
             "published_file_type": TEXTURE_SET_PUBLISH_TYPE,
             "dependency_ids": item.properties["textures_publish_ids"],
         }
 
-        sg_publish_data = sgtk.util.register_publish(**publish_data)
+        try:
+            sg_publish_data = sgtk.util.register_publish(**publish_data)
+        finally:
+            # The generated thumbnail was only written to be uploaded
+            self._delete_generated_thumbnail(item)
         self.logger.info("Texture Set Publish registered!")
         self.logger.debug(
             "ShotGrid Publish data...",
@@ -523,6 +618,20 @@ class SubstancePainterTextureExportPlugin(HookBaseClass):
 
     ############################################ Private methods
 
+    def _delete_generated_thumbnail(self, item):
+        """
+        Delete the thumbnail generated for the texture publishes, if any.
+
+        :param item: Item to process
+        """
+        thumb_path = item.properties.pop("_cached_thumb_path", None)
+        if not thumb_path:
+            return
+        try:
+            os.remove(thumb_path)
+        except OSError as e:
+            self.logger.debug(f"Could not delete thumbnail '{thumb_path}': {e}")
+
     def _group_texture_sequences(self, paths):
         """
         Groups texure file paths by their base name, treating numbered sequences (UDIMs) as the same file.
@@ -530,43 +639,322 @@ class SubstancePainterTextureExportPlugin(HookBaseClass):
         Example:
             ['DefaultMaterial_BaseColor_ACEScg.1001.exr',
              'DefaultMaterial_BaseColor_ACEScg.1002.exr'] > will be grouped together
+
+        :param list paths: Texture file paths
+        :returns: List of groups, each a list of (filename, path) tuples
         """
-        groups = {}
+        groups = defaultdict(list)
+        sep = os.sep
+        altsep = os.altsep
+        udim_sub = UDIM_SUB_REGEX.sub
 
         for path in paths:
-            filename = os.path.basename(path)
+            filename = path.rpartition(sep)[2]
+            if altsep and altsep in filename:
+                # Windows paths may use both separators
+                filename = os.path.basename(path)
             # Match pattern like .1001, .1002, etc. before the extension
             # This regex finds .<digits> before the file extension
-            key = re.sub(r"\.\d+(\.\w+)$", r".<UDIM>\1", filename)
-            groups.setdefault(key, []).append(path)
+            key = udim_sub(r".<UDIM>\1", filename)
+            groups[key].append((filename, path))
 
         # Return as list of lists, maintaining insertion order
         return list(groups.values())
 
+    def _prepare_texture_group(
+        self, item, grouped_texture_path, publish_templates, ensured_dirs
+    ):
+        """
+        Resolves the publish paths of a group of texture files (a single file, or
+        all the UDIMs of a map) and creates their publish folders.
+
+        Called from the main thread, between the exports: sgtk's
+        ensure_folder_exists() temporarily clears the process wide umask.
+
+        :param item: Item to process
+        :param list grouped_texture_path: (filename, path) tuples of the group
+        :param dict publish_templates: (publish template, context fields) tuples,
+            keyed by whether the texture files use UDIMs
+        :param set ensured_dirs: Publish folders already created during this
+            publish. Updated with the folders created for this group.
+        :returns: Tuple of (list of (texture path, publish file) tuples, abstract
+            publish path, publish name)
+        """
+        # If the 'grouped_texture_path' list contains a single filepath
+        # it means we have no UDIMs
+        texture_publish_template, base_fields = publish_templates[
+            len(grouped_texture_path) > 1
+        ]
+
+        # We are not using a work template for the textures because, AFAIK
+        # there is no way to fully customize the substance export system
+        # Instead, we extract the rest of the fields by analyzing the file paths,
+        # assuming we exported using a predefined 'shotgrid' export
+        match_texture_filename = TEXTURE_FILENAME_REGEX.match
+        texture_copies = []
+        for filename, texture_path in grouped_texture_path:
+            match = match_texture_filename(filename).groupdict()
+            # The fields of the texture file, layered over the shared base fields
+            texture_fields = {
+                "texture_map": match["texture_map"],
+                "colorspace": match["colorspace"],
+                "extension": match["extension"],
+            }
+            if match["udim"]:
+                texture_fields["UDIM"] = int(match["udim"])
+
+            texture_publish_file = texture_publish_template.apply_fields(
+                dict(ChainMap(texture_fields, base_fields))
+            )
+            texture_copies.append((texture_path, texture_publish_file))
+
+        # Create the publish folders of the texture files
+        # All the UDIMs of a map usually land in the same folder
+        for _, texture_publish_file in texture_copies:
+            publish_folder = os.path.dirname(texture_publish_file)
+            if publish_folder not in ensured_dirs:
+                ensure_folder_exists(publish_folder)
+                ensured_dirs.add(publish_folder)
+
+        # Construct the (abstract) publish path
+        texture_fields.pop("UDIM", None)
+        fields = ChainMap(texture_fields, base_fields)
+        texture_publish_path = texture_publish_template.apply_fields(dict(fields))
+
+        # Create the publish name
+        publish_name = f"{fields['Asset']}_{fields['task_name']}_{item.properties['texture_set_name']}_{fields['texture_map']}"
+
+        return texture_copies, texture_publish_path, publish_name
+
+    def _copy_texture_files(self, texture_copies):
+        """
+        Copies (and renames) texture files to their publish destination.
+
+        Called from the publish worker threads: it only does file I/O, and
+        neither logs nor calls ShotGrid, see :meth:`_register_texture_publish`.
+
+        :param list texture_copies: (texture path, publish file) tuples, whose
+            publish folders already exist
+        :returns: List of debug messages to log from the main thread
+        """
+        # The UDIM tiles are copied one after the other: the groups themselves
+        # are already spread over the publish workers
+        copy_messages = []
+        for texture_path, texture_publish_file in texture_copies:
+            try:
+                copy_messages.extend(
+                    self._fast_copy(texture_path, texture_publish_file)
+                )
+            except Exception:
+                raise Exception(
+                    "Failed to copy work file from '%s' to '%s'.\n%s"
+                    % (texture_path, texture_publish_file, traceback.format_exc())
+                )
+        return copy_messages
+
+    def _register_texture_publish(
+        self, item, texture_publish_path, publish_name, publish_dependencies_ids
+    ):
+        """
+        Registers the publish of a copied group of texture files.
+
+        Called from the main thread.
+
+        :param item: Item to process
+        :param str texture_publish_path: Abstract publish path of the group
+        :param str publish_name: Name of the publish
+        :param list publish_dependencies_ids: Ids the texture publish depends on
+        :returns: The id of the registered publish
+        """
+        publisher = self.parent
+
+        publish_data = {
+            "tk": publisher.sgtk,
+            "context": item.context,
+            "comment": item.description,
+            "path": texture_publish_path,
+            "name": publish_name,
+            "version_number": item.properties["version_number"],
+            "published_file_type": TEXTURE_PUBLISH_TYPE,
+            "dependency_ids": publish_dependencies_ids,
+        }
+
+        sg_publish_data = sgtk.util.register_publish(**publish_data)
+        self.logger.info("Texture Publish registered!")
+        self.logger.debug(
+            "ShotGrid Publish data...",
+            extra={
+                "action_show_more_info": {
+                    "label": "ShotGrid Publish Data",
+                    "tooltip": "Show the complete ShotGrid Publish Entity dictionary",
+                    "text": "<pre>%s</pre>" % (pprint.pformat(sg_publish_data),),
+                }
+            },
+        )
+
+        # TODO check conflicting publishes somewhere....
+
+        # Return the id of the registered texture publish
+        return sg_publish_data["id"]
+
+    def _fast_copy(self, source_path, target_path):
+        """
+        Copy a texture file to its publish location.
+
+        Tries os.copy_file_range() first where available, then relies on
+        shutil.copyfile(), which uses the kernel's zero-copy primitives
+        where available (sendfile on Linux, fcopyfile on macOS) and a large buffer
+        otherwise. Unlike sgtk's copy_file(), it does not touch the process umask
+        so it is safe to call from several threads.
+        Falls back to a plain buffered copy if the copy fails.
+
+        Called from the publish worker threads, so it doesn't log: the fallbacks
+        are reported in the returned messages instead.
+
+        :param str source_path: Path of the file to copy
+        :param str target_path: Path of the copy
+        :returns: List of debug messages describing the fallbacks used
+        """
+        messages = []
+        if _HAS_COPY_FILE_RANGE:
+            try:
+                self._copy_file_range(source_path, target_path)
+                os.chmod(target_path, _PUBLISH_FILE_PERMISSIONS)
+                return messages
+            except OSError as e:
+                # Typically EXDEV (cross filesystem copy on older kernels) or
+                # a filesystem that doesn't support it: try a regular copy
+                messages.append(
+                    f"copy_file_range of '{source_path}' failed ({e}), using shutil"
+                )
+
+        try:
+            shutil.copyfile(source_path, target_path)
+            os.chmod(target_path, _PUBLISH_FILE_PERMISSIONS)
+        except OSError as e:
+            messages.append(
+                f"Fast copy of '{source_path}' failed ({e}), using a buffered copy"
+            )
+            # Like sgtk's copy_file(), without touching the process umask
+            with open(source_path, "rb") as source, open(target_path, "wb") as target:
+                shutil.copyfileobj(source, target, _BUFFERED_COPY_SIZE)
+            os.chmod(target_path, _PUBLISH_FILE_PERMISSIONS)
+        return messages
+
+    def _copy_file_range(self, source_path, target_path):
+        """
+        Copy a file with os.copy_file_range(), letting the kernel (or the
+        filesystem) move the data.
+
+        :param str source_path: Path of the file to copy
+        :param str target_path: Path of the copy
+        :raises OSError: If the kernel can't copy the file this way
+        """
+        with open(source_path, "rb") as source, open(target_path, "wb") as target:
+            source_fd = source.fileno()
+            target_fd = target.fileno()
+            remaining = os.fstat(source_fd).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(source_fd, target_fd, remaining)
+                if not copied:
+                    break
+                remaining -= copied
+            if remaining:
+                # The file shrank, or the filesystem stopped copying
+                raise OSError(f"copy_file_range stopped with {remaining} bytes left")
+
+    def _get_thumbnail_source_path(self, grouped_texture_paths):
+        """
+        Pick the texture file the texture set thumbnail is generated from:
+        the first base color map if any, otherwise the first exported file.
+
+        :param list grouped_texture_paths: (filename, path) tuples, grouped by map
+        :returns: Path of a texture file
+        """
+        for grouped_texture_path in grouped_texture_paths:
+            filename, texture_path = grouped_texture_path[0]
+            match = TEXTURE_FILENAME_REGEX.match(filename)
+            if match and match.group("texture_map").lower() in THUMBNAIL_TEXTURE_MAPS:
+                return texture_path
+
+        return grouped_texture_paths[0][0][1]
+
     def _generate_thumbnail(self, source_path):
         """
         Generate thumbnail using OpenImageIO.
         """
-        try:
-            import OpenImageIO as oiio
-        except ImportError:
+        oiio = SubstancePainterTextureExportPlugin._oiio
+        if oiio is None:
+            try:
+                import OpenImageIO as oiio
+            except ImportError:
+                oiio = False
+            SubstancePainterTextureExportPlugin._oiio = oiio
+        if not oiio:
             self.logger.warning("OpenImageIO not available, cannot generate thumbnail")
             return None
 
         try:
+            # Pick the smallest MIP level (if the file has any) that is still at
+            # least as big as the thumbnail, to avoid decoding the full resolution
+            image_input = oiio.ImageInput.open(source_path)
+            if not image_input:
+                raise RuntimeError(oiio.geterror())
+            try:
+                spec = image_input.spec()
+                miplevel = 0
+                while image_input.seek_subimage(0, miplevel + 1):
+                    mip_spec = image_input.spec()
+                    if (
+                        mip_spec.width < THUMBNAIL_SIZE
+                        or mip_spec.height < THUMBNAIL_SIZE
+                    ):
+                        break
+                    miplevel += 1
+                    spec = mip_spec
+            finally:
+                image_input.close()
+
             # Read the file
-            buf = oiio.ImageBuf(source_path)
-            resized_buf = oiio.ImageBufAlgo.fit(
-                buf, roi=oiio.ROI(0, 512, 0, 512, 0, 1, 0, 3)
-            )
-            oiio.ImageBufAlgo.colorconvert(
-                resized_buf, resized_buf, "scene_linear", "sRGB"
+            buf = oiio.ImageBuf(source_path, 0, miplevel)
+
+            # Only keep the color channels for the resize and color conversion
+            if spec.nchannels > 3:
+                buf = oiio.ImageBufAlgo.channels(buf, (0, 1, 2))
+
+            # Nearest neighbour resample, keeping the aspect ratio
+            scale = min(1.0, THUMBNAIL_SIZE / max(spec.width, spec.height))
+            resized_buf = oiio.ImageBufAlgo.resample(
+                buf,
+                interpolate=False,
+                roi=oiio.ROI(
+                    0,
+                    max(1, round(spec.width * scale)),
+                    0,
+                    max(1, round(spec.height * scale)),
+                    0,
+                    1,
+                    0,
+                    buf.nchannels,
+                ),
             )
+            color_spaces = SubstancePainterTextureExportPlugin._thumbnail_color_spaces
+            if color_spaces is None:
+                color_spaces = self._resolve_thumbnail_color_spaces(oiio)
+                SubstancePainterTextureExportPlugin._thumbnail_color_spaces = (
+                    color_spaces
+                )
+            oiio.ImageBufAlgo.colorconvert(resized_buf, resized_buf, *color_spaces)
+            resized_buf.specmod().attribute("Compression", "jpeg:85")
 
             # Create temp filepath
-            temp_dir = tempfile.gettempdir()
-            thumb_filename = f"sgtk_thumb_{os.path.basename(source_path)}.jpg"
-            thumb_path = os.path.join(temp_dir, thumb_filename)
+            with tempfile.NamedTemporaryFile(
+                prefix=f"sgtk_thumb_{os.path.basename(source_path)}_",
+                suffix=".jpg",
+                dir=_THUMBNAIL_DIR,
+                delete=False,
+            ) as thumb_file:
+                thumb_path = thumb_file.name
 
             # Write the image buffer
             resized_buf.write(thumb_path)
@@ -578,6 +966,25 @@ class SubstancePainterTextureExportPlugin(HookBaseClass):
             self.logger.debug(f"Failed to generate thumbnail: {e}")
             return None
 
+    def _resolve_thumbnail_color_spaces(self, oiio):
+        """
+        Resolve the color spaces of the thumbnail color conversion.
+
+        The 'scene_linear' role is resolved to its color space name once, so
+        OIIO looks up the same cached color processor for every thumbnail.
+
+        :param oiio: The OpenImageIO module
+        :returns: Tuple of (from, to) color space names
+        """
+        from_space = "scene_linear"
+        try:
+            from_space = (
+                oiio.ColorConfig().getColorSpaceNameByRole(from_space) or from_space
+            )
+        except Exception as e:
+            self.logger.debug(f"Could not resolve the '{from_space}' role: {e}")
+        return (from_space, "sRGB")
+
     def _show_preset_warning_dialog(self, export_preset_name):
         """
         Show warning dialog for incorrect export preset
@@ -607,13 +1014,16 @@ class SubstancePainterTextureExportPlugin(HookBaseClass):
 
         layout.addWidget(text_label)
 
-        image_path = os.path.join(
-            engine.disk_location, "resources", "dialogs", "export_preset_info.png"
-        )
+        if SubstancePainterTextureExportPlugin._cached_warning_pixmap is None:
+            image_path = os.path.join(
+                engine.disk_location, "resources", "dialogs", "export_preset_info.png"
+            )
+            SubstancePainterTextureExportPlugin._cached_warning_pixmap = (
+                QtGui.QPixmap(image_path)
+            )
         image_label = QtGui.QLabel()
-        pixmap = QtGui.QPixmap(image_path)
 
-        image_label.setPixmap(pixmap)
+        image_label.setPixmap(self._cached_warning_pixmap)
         image_label.setAlignment(QtCore.Qt.AlignCenter)
         layout.addWidget(image_label)
 
@@ -692,6 +1102,8 @@ class SubstancePainterTextureExportPlugin(HookBaseClass):
         widget.export_preset_index = settings["ShotGrid Export Preset index"]
 
 
+# Qt is only imported here, for the settings widget. The plugin methods using
+# QtCore/QtGui resolve them from the module globals when they are called.
 try:
     from sgtk.platform.qt import QtCore, QtGui
 except ImportError:
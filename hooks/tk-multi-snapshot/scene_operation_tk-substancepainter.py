@@ -29,6 +29,10 @@ import substance_painter as sp
 
 HookClass = sgtk.get_hook_baseclass()
 
+# Substance Painter enums used by the scene operations
+_SAVE_FULL = sp.project.ProjectSaveMode.Full
+_SAVE_INCREMENTAL = sp.project.ProjectSaveMode.Incremental
+
 
 class SceneOperation(HookClass):
     """
@@ -57,34 +61,59 @@ class SceneOperation(HookClass):
                                      file path as a String
                     all others     - None
         """
-        engine = sgtk.platform.current_engine()
+        # Looked up on the instance, so a derived hook can override an operation
+        handler = getattr(self, "_do_" + operation, None)
+        if handler:
+            return handler(file_path, context)
+
+    def _do_current_path(self, file_path, context):
+        """
+        Returns the path of the current project.
+        """
+        # This is called by the app to find out the path of the current
+        # open project, which is the source for the snapshot. The app
+        # uses this path to create the snapshot filename.
+        return sgtk.platform.current_engine().get_project_path()
 
-        # ---- Get the current scene path
-        if operation == "current_path":
-            # This is called by the app to find out the path of the current
-            # open project, which is the source for the snapshot. The app
-            # uses this path to create the snapshot filename.
-            return engine.get_project_path()
-
-        # ---- Open a file
-        elif operation == "open":
-            # This is called when a user double-clicks a snapshot in the UI
-            # to restore it. The app provides the file_path to open.
+    def _do_open(self, file_path, context):
+        """
+        Opens the given project file.
+        """
+        # This is called when a user double-clicks a snapshot in the UI
+        # to restore it. The app provides the file_path to open.
+        with self._busy_indicator("Opening the snapshot..."):
             sp.project.open(file_path)
 
-        # ---- Save the current file
-        elif operation == "save":
-            # This is called when a user is working on a snapshot and saves it
-            # via the app's "Save" command.
-            sp.project.save(sp.project.ProjectSaveMode.Full)
-
-        # ---- Save the current file as a new file
-        elif operation == "save_as":
-            # This is the most important operation for this hook. It's called
-            # when the user clicks the "Create Snapshot" button. The app provides
-            # the file_path where the new snapshot file should be saved.
-            sp.project.save_as(file_path, sp.project.ProjectSaveMode.Incremental)
-
-            ### NOTE: the substance painter api proposes another method :
-            #  sp.project.save_as_copy()
-            # perhaps this method should be used for tk-multi-snapshot ?
+    def _do_save(self, file_path, context):
+        """
+        Saves the current project.
+        """
+        # This is called when a user is working on a snapshot and saves it
+        # via the app's "Save" command.
+        with self._busy_indicator("Saving the project..."):
+            sp.project.save(_SAVE_FULL)
+
+    def _do_save_as(self, file_path, context):
+        """
+        Saves the current file as a new file.
+        """
+        # This is the most important operation for this hook. It's called
+        # when the user clicks the "Create Snapshot" button. The app provides
+        # the file_path where the new snapshot file should be saved.
+        with self._busy_indicator("Saving the snapshot..."):
+            sp.project.save_as(file_path, _SAVE_INCREMENTAL)
+
+        ### NOTE: the substance painter api proposes another method :
+        #  sp.project.save_as_copy()
+        # perhaps this method should be used for tk-multi-snapshot ?
+
+    def _busy_indicator(self, message):
+        """
+        Returns a context manager showing a busy indicator while a blocking
+        Substance Painter operation runs.
+
+        :param str message: The text displayed while the operation runs
+        """
+        engine = sgtk.platform.current_engine()
+        tk_substancepainter = engine.import_module("tk_substancepainter")
+        return tk_substancepainter.utils.busy_indicator(message)
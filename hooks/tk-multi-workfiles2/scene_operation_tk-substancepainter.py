@@ -21,17 +21,21 @@ __author__ = "Donat Van Bellinghen"
 __contact__ = "https://www.linkedin.com/in/donat-van-bellinghen"
 __credits__ = ["Diego Garcia Huerta", "Donat Van Bellinghen"]
 
-import os
-import sys
-
 import substance_painter as sp
 import tank as sgtk
-from sgtk.platform.qt6 import QtCore, QtGui, QtWidgets
 
 HookClass = sgtk.get_hook_baseclass()
 
+# Substance Painter enums used by the scene operations
+_SAVE_FULL = sp.project.ProjectSaveMode.Full
+_SAVE_INCREMENTAL = sp.project.ProjectSaveMode.Incremental
+_WORKFLOW_DEFAULT = sp.project.ProjectWorkflow.Default
+_WORKFLOW_UVTILE = sp.project.ProjectWorkflow.UVTile
+
 
 def simple_save_dialog(main_window):
+    from sgtk.platform.qt6 import QtCore, QtWidgets
+
     dialog = QtWidgets.QDialog(main_window)
     dialog.setWindowTitle("Save your project ?")
     dialog.setWindowModality(QtCore.Qt.WindowModal)
@@ -112,103 +116,138 @@ class SceneOperation(HookClass):
                                                  state, otherwise False
                                 all others     - None
         """
-        app = self.parent
-        engine = app.engine
+        # Looked up on the instance, so a derived hook can override an operation
+        handler = getattr(self, "_do_" + operation, None)
+        if handler:
+            return handler(file_path, context, parent_action)
 
-        if operation == "current_path":
-            # This is called by Workfiles to find out the path of the current
-            # open project.
-            return engine.get_project_path()
+    def _do_current_path(self, file_path, context, parent_action):
+        """
+        Returns the path of the current project.
+        """
+        # This is called by Workfiles to find out the path of the current
+        # open project.
+        return self.parent.engine.get_project_path()
 
-        elif operation == "open":
-            # This is called when a user clicks "Open" in the Workfiles UI.
-            # It opens the specified project file.
+    def _do_open(self, file_path, context, parent_action):
+        """
+        Opens the given project file.
+        """
+        # This is called when a user clicks "Open" in the Workfiles UI.
+        # It opens the specified project file.
+        with self._busy_indicator("Opening the project..."):
             sp.project.open(file_path)
 
-        elif operation == "save":
-            # This is called when a user clicks "Save" in the Workfiles UI.
-            # It saves the current project.
-            sp.project.save(sp.project.ProjectSaveMode.Incremental)
-
-        # ---- Save the current file as a new file
-        elif operation == "save_as":
-            # This is called when a user clicks "Save As" in the Workfiles UI.
-            # It saves the current project to the specified path.
-            sp.project.save_as(file_path, sp.project.ProjectSaveMode.Full)
-
-        # ---- Reset the scene to an empty state for a new file
-        elif operation == "reset":
-            # If no project is open, nothing to do
-            if not sp.project.is_open():
-                return True
-
-            # If a project is open, check if we need to save it
-            if sp.project.needs_saving():
-                if simple_save_dialog(sp.ui.get_main_window()):
-                    sp.project.save(sp.project.ProjectSaveMode.Incremental)
-
-            sp.project.close()
+    def _do_save(self, file_path, context, parent_action):
+        """
+        Saves the current project.
+        """
+        # This is called when a user clicks "Save" in the Workfiles UI.
+        # It saves the current project.
+        with self._busy_indicator("Saving the project..."):
+            sp.project.save(_SAVE_INCREMENTAL)
+
+    def _do_save_as(self, file_path, context, parent_action):
+        """
+        Saves the current file as a new file.
+        """
+        # This is called when a user clicks "Save As" in the Workfiles UI.
+        # It saves the current project to the specified path.
+        with self._busy_indicator("Saving the project..."):
+            sp.project.save_as(file_path, _SAVE_FULL)
+
+    def _do_reset(self, file_path, context, parent_action):
+        """
+        Resets the scene to an empty state for a new file.
+
+        :returns: True
+        """
+        # If no project is open, nothing to do
+        if not sp.project.is_open():
             return True
 
-        # ---- Prepare for a new file operation
-        elif operation == "prepare_new" and parent_action == "new_file":
-            tk_substancepainter = engine.import_module("tk_substancepainter")
-            _, new_proj_dialog = engine.show_modal(
-                "New Substance Project",
-                app,
-                tk_substancepainter.NewProjectDialog,
-                context,
-            )
+        # If a project is open, check if we need to save it
+        if sp.project.needs_saving():
+            if simple_save_dialog(sp.ui.get_main_window()):
+                with self._busy_indicator("Saving the project..."):
+                    sp.project.save(_SAVE_INCREMENTAL)
+
+        sp.project.close()
+        return True
+
+    def _do_prepare_new(self, file_path, context, parent_action):
+        """
+        Prepares for a new file operation: asks for the new project settings
+        and creates the project.
+        """
+        if parent_action != "new_file":
+            return
 
-            if new_proj_dialog.exit_code == QtWidgets.QDialog.Rejected:
-                return
-
-            mesh_path = new_proj_dialog.get_mesh_file_path()
-            mesh_path = engine.convert_unc_path_to_mapped_drive_path(mesh_path)
-            sp_template = new_proj_dialog.get_selected_sp_template_path()
-
-            resolution = new_proj_dialog.get_resolution()
-
-            normal_map_format = new_proj_dialog.get_normal_map_format()
-
-            tangent_space = new_proj_dialog.get_tangent_space()
-
-            use_uvtile_workflow = sp.project.ProjectWorkflow.Default
-            if new_proj_dialog.get_use_uvtile_workflow():
-                use_uvtile_workflow = sp.project.ProjectWorkflow.UVTile
-
-            # Determine the export path for the textures
-            resolved_export_path = ""
-            export_area = engine.get_texture_export_work_area_template()
-            if export_area:
-                fields = context.as_template_fields(export_area)
-                resolved_export_path = export_area.apply_fields(fields)
-                resolved_export_path = engine.convert_unc_path_to_mapped_drive_path(
-                    resolved_export_path
-                )
-
-            # Declare the settings for the project:
-            # Note : Project settings override the template parameters.
-            project_settings = sp.project.Settings(
-                import_cameras=False,
-                normal_map_format=normal_map_format,
-                tangent_space_mode=tangent_space,
-                project_workflow=use_uvtile_workflow,
-                export_path=resolved_export_path,
-                default_texture_resolution=resolution,
+        from sgtk.platform.qt6 import QtWidgets
+
+        app = self.parent
+        engine = app.engine
+
+        tk_substancepainter = engine.import_module("tk_substancepainter")
+        _, new_proj_dialog = engine.show_modal(
+            "New Substance Project",
+            app,
+            tk_substancepainter.NewProjectDialog,
+            context,
+        )
+
+        if new_proj_dialog.exit_code == QtWidgets.QDialog.Rejected:
+            return
+
+        mesh_path = new_proj_dialog.get_mesh_file_path()
+        mesh_path = engine.convert_unc_path_to_mapped_drive_path(mesh_path)
+        sp_template = new_proj_dialog.get_selected_sp_template_path()
+
+        resolution = new_proj_dialog.get_resolution()
+
+        normal_map_format = new_proj_dialog.get_normal_map_format()
+
+        tangent_space = new_proj_dialog.get_tangent_space()
+
+        use_uvtile_workflow = _WORKFLOW_DEFAULT
+        if new_proj_dialog.get_use_uvtile_workflow():
+            use_uvtile_workflow = _WORKFLOW_UVTILE
+
+        # Determine the export path for the textures
+        resolved_export_path = engine.get_texture_export_work_area_path(context) or ""
+
+        # Declare the settings for the project:
+        # Note : Project settings override the template parameters.
+        project_settings = sp.project.Settings(
+            import_cameras=False,
+            normal_map_format=normal_map_format,
+            tangent_space_mode=tangent_space,
+            project_workflow=use_uvtile_workflow,
+            export_path=resolved_export_path,
+            default_texture_resolution=resolution,
+        )
+
+        # NOTE : It seems that if the mesh has no UV's the create() method will fail,
+        # which is not the case when the user creates a project from the UI,
+        # in that case an auto-unwrap is done.
+
+        try:
+            sp.project.create(
+                mesh_file_path=mesh_path,
+                settings=project_settings,
+                template_file_path=sp_template,
             )
+        except sp.exception.ProjectError as e:
+            self.logger.error(f"ProjectError : {e}")
+        except Exception as e:
+            self.logger.error(f"Error creating the project : {e}")
 
-            # NOTE : It seems that if the mesh has no UV's the create() method will fail,
-            # which is not the case when the user creates a project from the UI,
-            # in that case an auto-unwrap is done.
-
-            try:
-                sp.project.create(
-                    mesh_file_path=mesh_path,
-                    settings=project_settings,
-                    template_file_path=sp_template,
-                )
-            except sp.exception.ProjectError as e:
-                self.logger.error(f"ProjectError : {e}")
-            except Exception as e:
-                self.logger.error(f"Error creating the project : {e}")
+    def _busy_indicator(self, message):
+        """
+        Returns a context manager showing a busy indicator while a blocking
+        Substance Painter operation runs.
+
+        :param str message: The text displayed while the operation runs
+        """
+        tk_substancepainter = self.parent.engine.import_module("tk_substancepainter")
+        return tk_substancepainter.utils.busy_indicator(message)
@@ -22,11 +22,24 @@ __contact__ = "https://www.linkedin.com/in/donat-van-bellinghen"
 __credits__ = ["Diego Garcia Huerta", "Donat Van Bellinghen"]
 
 import os
+from collections import OrderedDict
+
 import sgtk
 import substance_painter as sp
+from sgtk.platform.qt6 import QtCore
 
 logger = sgtk.LogManager.get_logger(__name__)
 
+# Maximum number of project paths whose sgtk instance and context are cached
+_PATH_CACHE_SIZE = 32
+
+# Delay (ms) coalescing the bursts of project events into a single refresh
+_EVENT_DEBOUNCE_DELAY = 150
+
+# Translation table converting the separators of the paths returned by
+# Substance Painter, None where they already are the platform separator
+_SEP_TRANS = str.maketrans("/", os.path.sep) if os.path.sep != "/" else None
+
 
 class CallbackHandler(object):
     def __init__(self, engine):
@@ -38,11 +51,30 @@ class CallbackHandler(object):
             sp.event.ProjectCreated,
             sp.event.ProjectClosed,
         ]
+        # project path -> (tk, previous context, context): resolving them walks
+        # the file system and the project is saved (so resolved) very often
+        self._path_cache = OrderedDict()
+        # project path and context of the last resolution
+        self._last_path = None
+        self._last_context = None
+        # project path of the context resolution running in the background
+        self._resolving_path = None
+        # single shot timer refreshing the context, restarted by each event
+        self._pending_timer = None
 
     def register_callbacks(self):
         if not self.engine or self.engine.get_setting("automatic_context_switch"):
+            # The dispatcher only keeps weak references to the callbacks: the
+            # engine keeps its handler alive, and a handler left connected by an
+            # engine that was not cleanly destroyed goes away with it instead of
+            # handling the events forever. Without an engine, nothing else
+            # references the handler.
+            if self.engine:
+                connect = sp.event.DISPATCHER.connect
+            else:
+                connect = sp.event.DISPATCHER.connect_strong
             for ev in self.project_events:
-                sp.event.DISPATCHER.connect_strong(ev, self.on_project_event)
+                connect(ev, self.on_project_event)
 
             self.callbacks_registered = True
             logger.debug("Callbacks registered")
@@ -55,9 +87,21 @@ class CallbackHandler(object):
             self.callbacks_registered = False
             logger.debug("Callbacks Unregistered")
 
-    @staticmethod
-    def on_project_event(event):
-        engine = sgtk.platform.current_engine()
+        if self._pending_timer is not None:
+            self._pending_timer.stop()
+
+    def _get_engine(self):
+        """
+        Returns the engine the callbacks were registered for, falling back to
+        the current engine if the handler was created without one.
+        Returns None once the callbacks are unregistered.
+        """
+        if not self.callbacks_registered:
+            return None
+        return self.engine or sgtk.platform.current_engine()
+
+    def on_project_event(self, event):
+        engine = self._get_engine()
 
         if not engine:
             # If we don't have an engine for some reason then we don't have
@@ -67,6 +111,31 @@ class CallbackHandler(object):
             )
             return
 
+        if isinstance(event, sp.event.ProjectClosed):
+            engine.clear_project_path_cache()
+            # The project may be moved or re-configured before it is opened again
+            self._path_cache.pop(self._last_path, None)
+            self._last_path = None
+            self._last_context = None
+
+        # Events often come in bursts (incremental saves, auto saves, a project
+        # closed then another opened...): only refresh once they settle down
+        if self._pending_timer is None:
+            self._pending_timer = QtCore.QTimer()
+            self._pending_timer.setSingleShot(True)
+            self._pending_timer.setInterval(_EVENT_DEBOUNCE_DELAY)
+            self._pending_timer.timeout.connect(self._refresh_context)
+        self._pending_timer.start()
+
+    def _refresh_context(self):
+        """
+        Switches the engine to the context of the open project, once the
+        project events have settled down.
+        """
+        engine = self._get_engine()
+        if not engine:
+            return
+
         if not sp.project.is_open():
             # No substance scene has been opened yet, so we just leave the engine in the current
             # context and move on.
@@ -78,38 +147,187 @@ class CallbackHandler(object):
         # Get the path of the current open Substance scene file.
         current_project_path = sp.project.file_path()
 
-        if not current_project_path:
+        if not current_project_path or current_project_path.lower().endswith(".spt"):
+            # If the current project uses the filepath of the template file, just ignore
             return
 
-        current_project_path = current_project_path.replace("/", os.path.sep)
-        if os.path.splitext(current_project_path)[1].lower() == ".spt":
-            # If the current project uses the filepath of the template file, just ignore
+        if _SEP_TRANS:
+            current_project_path = current_project_path.translate(_SEP_TRANS)
+
+        if (
+            current_project_path == self._last_path
+            and current_context == self._last_context
+        ):
+            # Typically the same project saved again: nothing to resolve
             return
 
-        try:
-            tk = sgtk.sgtk_from_path(current_project_path)
-            logger.debug(
-                "Extracted sgtk instance: '%r' from path: '%r'",
-                tk,
-                current_project_path,
-            )
-        except sgtk.TankError as e:
-            logger.warning(
-                f"Project file: '{current_project_path}' does not appear to belong to a ShotGrid project.\n"
-                "Disabling the ShotGrid engine and menu."
-            )
-            sp.logging.warning("ShotGrid: Engine cannot be started: %s" % e)
-            # Disable the ShotGrid menu
-            engine.menu_generator.disable_menu()
+        cached = self._path_cache.get(current_project_path)
+        if cached:
+            self._path_cache.move_to_end(current_project_path)
+            tk, previous_context, new_context = cached
+            if previous_context == current_context:
+                self._on_context_resolved(
+                    current_project_path, current_context, tk, new_context
+                )
+                return
+        else:
+            tk = None
+
+        if current_project_path == self._resolving_path:
+            # Already being resolved, its result will be applied
+            return
+
+        # Resolving the sgtk instance and the context walks the file system,
+        # which can take a while on network drives: do it in the background to
+        # keep Substance Painter responsive, and apply the result from the main
+        # thread
+        self._resolving_path = current_project_path
+        QtCore.QThreadPool.globalInstance().start(
+            _ContextResolver(engine, self, current_project_path, current_context, tk)
+        )
+
+    def _on_context_resolved(self, project_path, previous_context, tk, new_context):
+        """
+        Applies a resolved context, in the main thread.
+
+        :param str project_path: Path of the project the context was resolved from
+        :param previous_context: Context the resolution started from
+        :param tk: The sgtk instance of the project
+        :param new_context: The resolved context
+        """
+        if project_path == self._resolving_path:
+            self._resolving_path = None
+
+        engine = self._get_engine()
+        if not engine:
+            return
+
+        if not self._is_current_project_path(project_path):
+            logger.debug("Ignoring the context resolved for '%s'", project_path)
             return
 
-        new_context = tk.context_from_path(current_project_path, current_context)
         logger.debug(
             "Given the path: '%s' the following context was extracted: '%r'",
-            current_project_path,
+            project_path,
             new_context,
         )
 
+        self._path_cache[project_path] = (tk, previous_context, new_context)
+        if len(self._path_cache) > _PATH_CACHE_SIZE:
+            self._path_cache.popitem(last=False)
+        self._last_path = project_path
+        self._last_context = new_context
+
+        current_context = engine.context
         if new_context != current_context:
             logger.debug("Changing the context to '%r", new_context)
             engine.change_context(new_context)
+
+    def _on_context_resolution_failed(self, project_path, error):
+        """
+        Disables the engine menu when the project doesn't belong to a ShotGrid
+        project, in the main thread.
+
+        :param str project_path: Path of the project
+        :param error: The :class:`sgtk.TankError` raised by the resolution
+        """
+        if project_path == self._resolving_path:
+            self._resolving_path = None
+
+        engine = self._get_engine()
+        if not engine or not self._is_current_project_path(project_path):
+            return
+
+        logger.warning(
+            f"Project file: '{project_path}' does not appear to belong to a ShotGrid project.\n"
+            "Disabling the ShotGrid engine and menu."
+        )
+        sp.logging.warning("ShotGrid: Engine cannot be started: %s" % error)
+        # Disable the ShotGrid menu
+        engine.menu_generator.disable_menu()
+
+    def _cancel_context_resolution(self, project_path):
+        """
+        Forgets a background context resolution that failed unexpectedly,
+        in the main thread.
+
+        :param str project_path: Path of the project
+        """
+        if project_path == self._resolving_path:
+            self._resolving_path = None
+
+    def _is_current_project_path(self, project_path):
+        """
+        Checks that a project path still is the one of the open project.
+        Results resolved in the background may be outdated when they arrive.
+
+        :param str project_path: Path of a project
+        :returns: True if the project is still open
+        """
+        if not sp.project.is_open():
+            return False
+        current_project_path = sp.project.file_path()
+        if not current_project_path:
+            return False
+        if _SEP_TRANS:
+            current_project_path = current_project_path.translate(_SEP_TRANS)
+        return current_project_path == project_path
+
+
+class _ContextResolver(QtCore.QRunnable):
+    """
+    Resolves the sgtk instance and the context of a project path in a
+    background thread, then hands the result to the callback handler in the
+    main thread.
+    """
+
+    def __init__(self, engine, handler, project_path, current_context, tk=None):
+        """
+        :param engine: The engine, used to get back to the main thread
+        :param handler: The :class:`CallbackHandler` to hand the result to
+        :param str project_path: Path of the project
+        :param current_context: Context to resolve the new context from
+        :param tk: The sgtk instance of the project, if already known
+        """
+        super().__init__()
+        self._engine = engine
+        self._handler = handler
+        self._project_path = project_path
+        self._current_context = current_context
+        self._tk = tk
+
+    def run(self):
+        tk = self._tk
+        try:
+            if tk is None:
+                tk = sgtk.sgtk_from_path(self._project_path)
+                logger.debug(
+                    "Extracted sgtk instance: '%r' from path: '%r'",
+                    tk,
+                    self._project_path,
+                )
+            new_context = tk.context_from_path(
+                self._project_path, self._current_context
+            )
+        except sgtk.TankError as e:
+            self._engine.async_execute_in_main_thread(
+                self._handler._on_context_resolution_failed, self._project_path, e
+            )
+            return
+        except Exception:
+            logger.exception(
+                "Failed to resolve the context of '%s'", self._project_path
+            )
+            # Let the handler resolve the path again on the next event
+            self._engine.async_execute_in_main_thread(
+                self._handler._cancel_context_resolution, self._project_path
+            )
+            return
+
+        self._engine.async_execute_in_main_thread(
+            self._handler._on_context_resolved,
+            self._project_path,
+            self._current_context,
+            tk,
+            new_context,
+        )
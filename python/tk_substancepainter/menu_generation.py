@@ -22,10 +22,16 @@ __contact__ = "https://www.linkedin.com/in/donat-van-bellinghen"
 __credits__ = ["Diego Garcia Huerta", "Donat Van Bellinghen"]
 
 
+from collections import defaultdict
+from operator import itemgetter
+
 import sgtk
 import substance_painter as sp
 from sgtk.platform.qt6 import QtCore, QtGui, QtWidgets
 
+# Marks a cached value that has not been computed yet (None is a valid value)
+_UNSET = object()
+
 
 class MenuGenerator(object):
     """
@@ -42,14 +48,33 @@ class MenuGenerator(object):
         self._engine = engine
         self._main_window = main_window
 
+        # app instance name of each app object, rebuilt with the menu
+        self._app_instance_names = {}
+        # (parent menu, label) -> sub-menu, for all the sub-menus of the menu
+        self._sub_menus = {}
+        # the 'menu_favourites' setting, read on the first menu build
+        self._menu_favourites = None
+        # what the current menu was built from, see _get_menu_signature()
+        self._menu_signature = None
+
         menu_bar = self._main_window.menuBar()
 
         # Create the QMenu object for the ShotGrid menu
         self._shotgrid_menu = QtWidgets.QMenu(title=sg_menu_name)
         menu_bar.addMenu(self._shotgrid_menu)
 
+    def invalidate_settings_cache(self):
+        """
+        Forgets the engine settings read by the menu, so that they are read
+        again on the next menu build. To call when the engine settings may have
+        changed, e.g. after a context change.
+        """
+        self._menu_favourites = None
+
     def disable_menu(self):
         self._shotgrid_menu.clear()
+        self._sub_menus.clear()
+        self._menu_signature = None
 
         sgtk_disabled = QtGui.QAction("Sgtk is disabled.", self._shotgrid_menu)
         self._shotgrid_menu.addAction(sgtk_disabled)
@@ -60,16 +85,31 @@ class MenuGenerator(object):
 
         self._shotgrid_menu.clear()
         self._shotgrid_menu = None
+        self._sub_menus.clear()
+        self._menu_signature = None
 
     def setup_menu_items(self):
         """
         Render the entire Shotgun menu.
         In order to have commands enable/disable themselves based on the
         enable_callback, re-create the menu items every time.
+        The menu is left untouched if nothing it is built from has changed,
+        enable_callback results included.
         """
+        if self._menu_favourites is None:
+            self._menu_favourites = self._engine.get_setting("menu_favourites")
+
+        # sort the commands and run their enable_callback once, for both the
+        # signature and the menu build
+        commands = self._get_commands()
+        menu_signature = self._get_menu_signature(commands)
+        if menu_signature == self._menu_signature:
+            return
+        self._menu_signature = None
 
         # Reset the menu, remove all items
         self._shotgrid_menu.clear()
+        self._sub_menus.clear()
 
         # now add the context item on top of the main menu
         self._context_menu = self._add_context_menu()
@@ -77,17 +117,31 @@ class MenuGenerator(object):
         # add menu divider
         self._add_divider(self._shotgrid_menu)
 
-        # now enumerate all items and create menu objects for them
-        menu_items = []
-        for cmd_name, cmd_details in self._engine.commands.items():
-            menu_items.append(AppCommand(cmd_name, self, cmd_details))
-
-        # sort list of commands in name order
-        menu_items.sort(key=lambda x: x.name)
+        # reverse the engine apps mapping once, for the commands lookups
+        self._app_instance_names = {
+            app_instance_obj: app_instance_name
+            for app_instance_name, app_instance_obj in self._engine.apps.items()
+        }
+
+        # now enumerate all items in name order and create menu objects for them
+        menu_items = [
+            AppCommand(cmd_name, self, cmd_details, enabled)
+            for cmd_name, cmd_details, enabled in commands
+        ]
+
+        # index the commands for the favourites lookups, only the commands whose
+        # name matches a favourite need their app instance name
+        menu_favourites = self._menu_favourites
+        favourite_names = {fav["name"] for fav in menu_favourites}
+        commands_by_instance_and_name = {
+            (cmd.get_app_instance_name(), cmd.name): cmd
+            for cmd in menu_items
+            if cmd.name in favourite_names
+        }
 
         # now add favourites
-        for fav in self._engine.get_setting("menu_favourites"):
-            self._add_favourite(fav, menu_items)
+        for fav in menu_favourites:
+            self._add_favourite(fav, commands_by_instance_and_name)
 
         # add menu divider
         self._add_divider(self._shotgrid_menu)
@@ -95,24 +149,63 @@ class MenuGenerator(object):
         # now add all apps to main menu
         self._add_app_menus(menu_items)
 
-    def _add_favourite(self, fav, menu_items):
+        self._menu_signature = menu_signature
+
+    def _get_commands(self):
+        """
+        Returns the engine commands in name order, with their enabled state.
+
+        :returns: A list of (name, command dict, enabled) tuples. enabled is the
+            result of the command's enable_callback, None if it has none.
+        """
+        commands = []
+        for cmd_name, cmd_details in sorted(
+            self._engine.commands.items(), key=itemgetter(0)
+        ):
+            enable_callback = cmd_details["properties"].get("enable_callback")
+            commands.append(
+                (cmd_name, cmd_details, enable_callback() if enable_callback else None)
+            )
+        return commands
+
+    def _get_menu_signature(self, commands):
+        """
+        Returns what the menu is built from: the context, the favourites and
+        the commands, with their callbacks and enabled state.
+
+        The commands callbacks are part of it (and kept alive by it): the apps
+        register new ones when they are reloaded, e.g. on a context change.
+
+        :param list commands: The commands, as returned by _get_commands()
+        :returns: A tuple, equal for menus that would be identical
+        """
+        ctx = self._engine.context
+        return (
+            ctx,
+            str(ctx),
+            bool(ctx.filesystem_locations),
+            tuple((fav["app_instance"], fav["name"]) for fav in self._menu_favourites),
+            tuple(
+                (cmd_name, cmd_details["callback"], cmd_details["properties"], enabled)
+                for cmd_name, cmd_details, enabled in commands
+            ),
+        )
+
+    def _add_favourite(self, fav, commands_by_instance_and_name):
         """
         Finds a command specified in the 'menu_favourites' setting and adds it
         directly to the top level of the menu.
-        """
-        app_instance_name = fav["app_instance"]
-        menu_name = fav["name"]
 
-        # scan through all menu items
-        for cmd in menu_items:
-            if (
-                cmd.get_app_instance_name() == app_instance_name
-                and cmd.name == menu_name
-            ):
-                # found our match!
-                cmd.add_command_to_menu(self._shotgrid_menu)
-                # mark as a favourite item
-                cmd.favourite = True
+        :param dict fav: A 'menu_favourites' entry
+        :param dict commands_by_instance_and_name: The commands, keyed by
+            (app instance name, command name)
+        """
+        cmd = commands_by_instance_and_name.get((fav["app_instance"], fav["name"]))
+        if cmd:
+            # found our match!
+            cmd.add_command_to_menu(self._shotgrid_menu)
+            # mark as a favourite item
+            cmd.favourite = True
 
     def _add_app_menus(self, menu_items):
         """
@@ -120,7 +213,8 @@ class MenuGenerator(object):
         - Commands with a 'context_menu' type are added to the context sub-menu.
         - Other commands are grouped into a dictionary by app name.
         """
-        commands_by_app = {}
+        # menu_items is sorted by name, so the commands of each app are too
+        commands_by_app = defaultdict(list)
         for cmd in menu_items:
             if cmd.get_type() == "context_menu":
                 # context menu!
@@ -132,8 +226,6 @@ class MenuGenerator(object):
                 if app_name is None:
                     # un-parented app
                     app_name = "Other Items"
-                if app_name not in commands_by_app:
-                    commands_by_app[app_name] = []
                 commands_by_app[app_name].append(cmd)
 
         self._add_commands_by_app_to_menu(commands_by_app)
@@ -149,22 +241,66 @@ class MenuGenerator(object):
         """Adds a new sub-menu to a parent QMenu."""
         sub_menu = QtWidgets.QMenu(title=menu_name, parent=parent_menu)
         parent_menu.addMenu(sub_menu)
+        self._sub_menus[(parent_menu, menu_name)] = sub_menu
         return sub_menu
 
-    def _add_menu_item(self, name, parent_menu, callback, properties=None):
+    def _add_menu_item(
+        self, name, parent_menu, callback, properties=None, enabled=None
+    ):
         """Adds a single action item to a QMenu."""
-        action = QtGui.QAction(name, parent_menu)
-        parent_menu.addAction(action)
-        action.triggered.connect(callback)
+        actions = self._add_menu_items_batch(
+            [(name, callback, properties, enabled)], parent_menu
+        )
+        return actions[0]
+
+    def _add_menu_items_batch(self, items, parent_menu):
+        """
+        Adds several action items to a QMenu at once, so the menu only updates
+        once for all of them.
 
-        if properties:
-            if "tooltip" in properties:
-                action.setTooltip(properties["tooltip"])
-                action.setStatustip(properties["tooltip"])
-            if "enable_callback" in properties:
-                action.setEnabled(properties["enable_callback"]())
+        :param list items: (name, callback, properties, enabled) tuples. enabled
+            is None for the actions that are always enabled.
+        :param parent_menu: The QMenu to add the actions to
+        :returns: The list of created QActions
+        """
+        actions = []
+        for name, callback, properties, enabled in items:
+            action = QtGui.QAction(name, parent_menu)
+            action.triggered.connect(callback)
+
+            if properties:
+                tooltip = properties.get("tooltip")
+                if tooltip:
+                    action.setToolTip(tooltip)
+                    action.setStatusTip(tooltip)
+            if enabled is not None:
+                action.setEnabled(enabled)
+
+            actions.append(action)
+
+        if actions:
+            parent_menu.addActions(actions)
+        return actions
+
+    def _add_commands_to_menu(self, cmds, menu):
+        """
+        Adds commands to a QMenu, in order. Consecutive commands that don't
+        live in sub-menus are added in a single batch.
 
-        return action
+        :param list cmds: The :class:`AppCommand` to add
+        :param menu: The QMenu to add the commands to
+        """
+        items = []
+        for cmd in cmds:
+            if "/" in cmd.name:
+                # the command goes in sub-menus: add the pending items first
+                # to keep the order
+                self._add_menu_items_batch(items, menu)
+                items = []
+                cmd.add_command_to_menu(menu)
+            else:
+                items.append((cmd.name, cmd.callback, cmd.properties, cmd.enabled))
+        self._add_menu_items_batch(items, menu)
 
     def _add_context_menu(self):
         """
@@ -217,28 +353,31 @@ class MenuGenerator(object):
         - If an app has multiple commands, a sub-menu is created for it.
         - If an app has only one command, it's added directly to the main menu.
         """
-        for app_name in sorted(commands_by_app.keys()):
-            if len(commands_by_app[app_name]) > 1:
+        # single commands, added to the main menu in batches between sub-menus
+        top_level_cmds = []
+        for app_name, cmds in sorted(commands_by_app.items()):
+            if len(cmds) > 1:
+                # keep the order of the main menu
+                self._add_commands_to_menu(top_level_cmds, self._shotgrid_menu)
+                top_level_cmds = []
+
                 # more than one menu entry fort his app
                 # make a sub menu and put all items in the sub menu
                 app_menu = self._add_sub_menu(app_name, self._shotgrid_menu)
 
-                # get the list of menu cmds for this app
-                cmds = commands_by_app[app_name]
-                # make sure it is in alphabetical order
-                cmds.sort(key=lambda x: x.name)
-
-                for cmd in cmds:
-                    cmd.add_command_to_menu(app_menu)
+                # the cmds are already in alphabetical order
+                self._add_commands_to_menu(cmds, app_menu)
             else:
                 # this app only has a single entry.
                 # display that on the menu
                 # todo: Should this be labelled with the name of the app
                 # or the name of the menu item? Not sure.
-                cmd_obj = commands_by_app[app_name][0]
+                cmd_obj = cmds[0]
                 if not cmd_obj.favourite:
                     # skip favourites since they are already on the menu
-                    cmd_obj.add_command_to_menu(self._shotgrid_menu)
+                    top_level_cmds.append(cmd_obj)
+
+        self._add_commands_to_menu(top_level_cmds, self._shotgrid_menu)
 
 
 class AppCommand(object):
@@ -249,12 +388,15 @@ class AppCommand(object):
     for interacting with the command's associated app and metadata.
     """
 
-    def __init__(self, name, parent, command_dict):
+    def __init__(self, name, parent, command_dict, enabled=None):
         self.name = name
         self.parent = parent
         self.properties = command_dict["properties"]
         self.callback = command_dict["callback"]
+        # result of the command's enable_callback, None if it has none
+        self.enabled = enabled
         self.favourite = False
+        self._app_instance_name = _UNSET
 
     def get_app_name(self):
         """
@@ -268,19 +410,21 @@ class AppCommand(object):
         """
         Returns the name of the app instance, as defined in the environment.
         Returns None if not found.
+
+        The name is looked up once and then cached on the command.
+        """
+        if self._app_instance_name is _UNSET:
+            self._app_instance_name = self._compute_app_instance_name()
+        return self._app_instance_name
+
+    def _compute_app_instance_name(self):
+        """
+        Looks up the name of the app instance in the apps of the menu's engine.
         """
         if "app" not in self.properties:
             return None
 
-        app_instance = self.properties["app"]
-        engine = app_instance.engine
-
-        for app_instance_name, app_instance_obj in engine.apps.items():
-            if app_instance_obj == app_instance:
-                # found our app!
-                return app_instance_name
-
-        return None
+        return self.parent._app_instance_names.get(self.properties["app"])
 
     def get_documentation_url_str(self):
         """
@@ -320,14 +464,11 @@ class AppCommand(object):
 
         # Add the final action to the determined parent menu.
         self.parent._add_menu_item(
-            parts[-1], parent_menu, self.callback, self.properties
+            parts[-1], parent_menu, self.callback, self.properties, self.enabled
         )
 
     def _find_sub_menu_item(self, menu, label):
         """
-        Helper to find an existing sub-menu QAction within a parent menu by its label.
+        Helper to find an existing sub-menu within a parent menu by its label.
         """
-        for action in menu.actions():
-            if action.text() == label:
-                return action.menu()
-        return None
+        return self.parent._sub_menus.get((menu, label))
@@ -22,7 +22,10 @@ __contact__ = "https://www.linkedin.com/in/donat-van-bellinghen"
 __credits__ = ["Diego Garcia Huerta", "Donat Van Bellinghen"]
 
 
+import concurrent.futures
 import enum
+import functools
+import operator
 import os
 import sys
 
@@ -30,11 +33,85 @@ import sgtk
 import substance_painter as sp
 from sgtk.platform.qt6 import QtCore, QtGui, QtWidgets
 
+from . import windows_folders
+
 
 
 
 logger = sgtk.LogManager.get_logger("__name__")
 
+# Extension of the Substance 3D Painter project templates
+_TEMPLATE_EXTENSION = ".spt"
+
+# Sort the templates by name without going through SPTemplateItem.__lt__
+_TEMPLATE_SORT_KEY = operator.attrgetter("name")
+
+# The mesh file extensions accepted when creating a new project
+_MESH_EXTENSIONS = (
+    ".fbx",
+    ".abc",
+    ".obj",
+    ".dae",
+    ".ply",
+    ".gltf",
+    ".glb",
+    ".usd",
+    ".usda",
+    ".usdc",
+    ".usdz",
+)
+_MESH_FILTER = "Mesh Files ({})".format(
+    " ".join(f"*{extension}" for extension in _MESH_EXTENSIONS)
+)
+
+# Substance Painter enums used by the New Project dialog
+_NORMAL_MAP_FORMAT_OPENGL = sp.project.NormalMapFormat.OpenGL
+_NORMAL_MAP_FORMAT_DIRECTX = sp.project.NormalMapFormat.DirectX
+_TANGENT_SPACE_PER_FRAGMENT = sp.project.TangentSpace.PerFragment
+_TANGENT_SPACE_PER_VERTEX = sp.project.TangentSpace.PerVertex
+
+
+@functools.lru_cache(maxsize=1)
+def _get_user_templates_directory():
+    """
+    Returns the platform-specific path to the user's Substance 3D Painter
+    user templates directory.
+
+    :return: Path to the user templates directory.
+    """
+    user_documents_dir = None
+    if sys.platform == "win32":
+        user_documents_dir = windows_folders.get_documents_directory()
+
+    if not user_documents_dir:  # macOS and Linux, or fallback on Windows
+        user_documents_dir = os.path.expanduser("~/Documents")
+
+    user_templates_path = os.path.join(
+        user_documents_dir,
+        "Adobe",
+        "Adobe Substance 3D Painter",
+        "assets",
+        "templates",
+    )
+    return user_templates_path
+
+
+@functools.lru_cache(maxsize=1)
+def _get_starter_assets_templates_directory():
+    """
+    Returns the directory holding the starter assets templates
+    i.e. the templates that come standard with Substance 3D Painter
+    """
+
+    if sys.platform == "win32":
+        path = r"C:\Program Files\Adobe\Adobe Substance 3D Painter\resources\starter_assets\templates"
+    elif sys.platform == "darwin":
+        path = "/Applications/Adobe Substance 3D Painter.app/Contents/Resources/starter_assets/templates"  ### to be verified
+    elif sys.platform.startswith("linux"):
+        path = "/opt/Adobe/Adobe_Substance_3D_Painter/resources/starter_assets/templates"  ### to be verified
+
+    return path
+
 
 class NewProjectDialog(QtWidgets.QWidget):
     """
@@ -48,8 +125,10 @@ class NewProjectDialog(QtWidgets.QWidget):
         QtWidgets.QWidget.__init__(self)
 
         self._engine = sgtk.platform.current_engine()
-        # Retrieve the substance painter templates and store them
-        self._sp_templates = self._get_templates()
+        # The substance painter templates are retrieved in the background,
+        # see _start_template_scan
+        self._sp_templates = []
+        self._template_scanner = None
 
         self._asset_root_directory = self._get_asset_root_path(context)
         self.selected_mesh_file_path = None
@@ -57,11 +136,22 @@ class NewProjectDialog(QtWidgets.QWidget):
         self.exit_code = QtWidgets.QDialog.Rejected
         # Create the UI
         self._create_ui()
+        self._templates_requested = False
 
     @property
     def hide_tk_title_bar(self):
         return False
 
+    def showEvent(self, event):
+        """
+        Start retrieving the templates once the dialog is shown, so its first
+        paint doesn't wait for the template directories.
+        """
+        super().showEvent(event)
+        if not self._templates_requested:
+            self._templates_requested = True
+            QtCore.QTimer.singleShot(0, self._start_template_scan)
+
     ############## public methods
 
     def get_mesh_file_path(self):
@@ -89,9 +179,9 @@ class NewProjectDialog(QtWidgets.QWidget):
 
     def get_tangent_space(self):
         if self.tangent_space_checkbox.isChecked():
-            return sp.project.TangentSpace.PerFragment
+            return _TANGENT_SPACE_PER_FRAGMENT
         else:
-            return sp.project.TangentSpace.PerVertex
+            return _TANGENT_SPACE_PER_VERTEX
 
     def get_use_uvtile_workflow(self):
         """
@@ -113,9 +203,9 @@ class NewProjectDialog(QtWidgets.QWidget):
         sp_template_dropdown_label = QtWidgets.QLabel("Template")
         self.sp_template_dropdown = QtWidgets.QComboBox()
 
-        self.sp_template_dropdown.addItem("Select template...", None)
-        for sp_template in self._sp_templates:
-            self.sp_template_dropdown.addItem(sp_template.name, sp_template)
+        # Placeholder until the template scan is done
+        self.sp_template_dropdown.addItem("Loading templates...", None)
+        self.sp_template_dropdown.setEnabled(False)
 
         sp_template_layout.addWidget(sp_template_dropdown_label)
         sp_template_layout.addWidget(self.sp_template_dropdown)
@@ -152,8 +242,8 @@ class NewProjectDialog(QtWidgets.QWidget):
         normalmap_format_layout = QtWidgets.QHBoxLayout()
         normalmap_format_label = QtWidgets.QLabel("Normal Map Format")
         self.normalmap_dropdown = QtWidgets.QComboBox()
-        self.normalmap_dropdown.addItem("OpenGL", sp.project.NormalMapFormat.OpenGL)
-        self.normalmap_dropdown.addItem("DirectX", sp.project.NormalMapFormat.DirectX)
+        self.normalmap_dropdown.addItem("OpenGL", _NORMAL_MAP_FORMAT_OPENGL)
+        self.normalmap_dropdown.addItem("DirectX", _NORMAL_MAP_FORMAT_DIRECTX)
         normalmap_format_layout.addWidget(normalmap_format_label)
         normalmap_format_layout.addWidget(self.normalmap_dropdown)
 
@@ -196,15 +286,54 @@ class NewProjectDialog(QtWidgets.QWidget):
         self.setLayout(main_layout)
         self.resize(540, 200)
 
+    def _start_template_scan(self):
+        """
+        Scan the template directories in a background thread, the template
+        dropdown is populated once the scan is done.
+        """
+        self._template_scanner = _TemplateScanner(self._get_templates)
+        self._template_scanner.signals.finished.connect(self._on_templates_scanned)
+        QtCore.QThreadPool.globalInstance().start(self._template_scanner)
+
+    def _on_templates_scanned(self, sp_templates):
+        """
+        Populate the template dropdown with the scanned templates
+
+        :param list sp_templates: The :class:`SPTemplateItem` instances found
+        """
+        self._template_scanner = None
+        self._sp_templates = sp_templates
+
+        # Build the whole model before handing it to the dropdown, rather than
+        # adding the items one by one, which updates the view for each of them
+        items = [QtGui.QStandardItem("Select template...")]
+        for sp_template in self._sp_templates:
+            item = QtGui.QStandardItem(sp_template.name)
+            item.setData(sp_template, QtCore.Qt.UserRole)
+            items.append(item)
+
+        model = QtGui.QStandardItemModel(self.sp_template_dropdown)
+        model.invisibleRootItem().appendRows(items)
+        self.sp_template_dropdown.setModel(model)
+        self.sp_template_dropdown.setEnabled(True)
+
     def _on_select_file(self):
         """
         Open file chooser dialog and store the selected file path
         """
+        # Custom directory icons and symlink resolution make Qt stat every
+        # entry of the (often remote) asset root before showing the dialog.
+        options = (
+            QtWidgets.QFileDialog.Option.DontUseCustomDirectoryIcons
+            | QtWidgets.QFileDialog.Option.DontResolveSymlinks
+            | QtWidgets.QFileDialog.Option.ReadOnly
+        )
         file_path, _ = QtWidgets.QFileDialog.getOpenFileName(
             self,
             "Select 3d mesh",
             self._asset_root_directory,  # Default directory
-            "Mesh Files (*.fbx *.abc *.obj *.dae *.ply *.gltf *.glb *.usd *.usda *.usdc *.usdz)",
+            _MESH_FILTER,
+            options=options,
         )
 
         if file_path:
@@ -254,76 +383,84 @@ class NewProjectDialog(QtWidgets.QWidget):
     ############## private methods related to substance painter templates
 
     @classmethod
-    def _get_user_templates_directory(cls):
+    def _get_templates(cls):
         """
-        Returns the platform-specific path to the user's Substance 3D Painter
-        user templates directory.
+        Returns the starter assets templates followed by the user templates.
+        This is called from a background thread, see :class:`_TemplateScanner`
 
-        :return: Path to the user templates directory.
+        Both directories are scanned in parallel as they usually live on
+        different volumes, the user templates possibly on a network share.
         """
-        if sys.platform == "win32":
-            import winreg
-
-            win_reg_key = winreg.OpenKey(
-                winreg.HKEY_CURRENT_USER,
-                r"Software\Microsoft\Windows\CurrentVersion\Explorer\User Shell Folders",
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            starter_assets_future = executor.submit(
+                cls._scan_templates_directory,
+                _get_starter_assets_templates_directory(),
+                True,
             )
-            user_documents_dir = os.path.expandvars(
-                winreg.QueryValueEx(win_reg_key, "Personal")[0]
-            )
-
-            user_templates_path = os.path.join(
-                user_documents_dir,
-                "Adobe",
-                "Adobe Substance 3D Painter",
-                "assets",
-                "templates",
+            user_future = executor.submit(
+                cls._scan_templates_directory, _get_user_templates_directory(), False
             )
-            return user_templates_path
+            starter_assets_templates = starter_assets_future.result()
+            user_templates = user_future.result()
 
-        else:  # macOS and Linux
-            user_templates_path = os.path.expanduser(
-                r"~/Documents/Adobe/Adobe Substance 3D Painter/assets/templates"
-            )
-            return user_templates_path
+        return starter_assets_templates + user_templates
 
-    @classmethod
-    def _get_starter_assets_templates_directory(cls):
+    @staticmethod
+    def _scan_templates_directory(templates_dir, is_starter):
         """
-        Returns the directory holding the starter assets templates
-        i.e. the templates that come standard with Substance 3D Painter
+        Returns the templates of a directory, sorted by name
+
+        :param str templates_dir: The directory to scan
+        :param bool is_starter: Whether the directory holds the starter assets
+            templates or the user templates
+        :return: A list of :class:`SPTemplateItem`, empty if the directory
+            doesn't exist
         """
+        if not os.path.isdir(templates_dir):
+            logger.debug(f"Templates directory does not exist: {templates_dir}")
+            return []
+
+        with os.scandir(templates_dir) as entries:
+            templates = [
+                SPTemplateItem(entry.path, is_starter=is_starter)
+                for entry in entries
+                if entry.name.lower().endswith(_TEMPLATE_EXTENSION)
+                and entry.is_file()
+            ]
+        templates.sort(key=_TEMPLATE_SORT_KEY)
+        return templates
 
-        if sys.platform == "win32":
-            path = r"C:\Program Files\Adobe\Adobe Substance 3D Painter\resources\starter_assets\templates"
-        elif sys.platform == "darwin":
-            path = "/Applications/Adobe Substance 3D Painter.app/Contents/Resources/starter_assets/templates"  ### to be verified
-        elif sys.platform.startswith("linux"):
-            path = "/opt/Adobe/Adobe_Substance_3D_Painter/resources/starter_assets/templates"  ### to be verified
 
-        return path
+class _TemplateScannerSignals(QtCore.QObject):
+    """
+    Signals emitted by :class:`_TemplateScanner`
+    """
 
-    def _get_templates(self):
-        starter_assets_templates_dir = self._get_starter_assets_templates_directory()
-        starter_assets_templates = [
-            SPTemplateItem(os.path.join(starter_assets_templates_dir, f))
-            for f in os.listdir(starter_assets_templates_dir)
-            if os.path.isfile(os.path.join(starter_assets_templates_dir, f))
-        ]
-        starter_assets_templates.sort()
-
-        user_templates = []
-
-        user_templates_dir = self._get_user_templates_directory()
-        if os.path.isdir(user_templates_dir):
-            user_templates = [
-                SPTemplateItem(os.path.join(user_templates_dir, f))
-                for f in os.listdir(user_templates_dir)
-                if os.path.isfile(os.path.join(user_templates_dir, f))
-            ]
-            user_templates.sort()
+    finished = QtCore.Signal(list)
 
-        return starter_assets_templates + user_templates
+
+class _TemplateScanner(QtCore.QRunnable):
+    """
+    Retrieves the substance painter templates in a background thread so the
+    dialog doesn't block on slow or remote template directories.
+    """
+
+    def __init__(self, get_templates):
+        """
+        :param get_templates: Callable returning the list of templates
+        """
+        super().__init__()
+        self.signals = _TemplateScannerSignals()
+        self._get_templates = get_templates
+
+    def run(self):
+        try:
+            sp_templates = self._get_templates()
+        except Exception:
+            logger.exception("Failed to retrieve the substance painter templates")
+            sp_templates = []
+        # Queued to the main thread, as the signals object lives there
+        self.signals.finished.emit(sp_templates)
 
 
 class SPTemplateItem:
@@ -331,20 +468,23 @@ class SPTemplateItem:
     Simple class to manage substance painter templates
     """
 
-    def __init__(self, filepath):
+    def __init__(self, filepath, is_starter):
+        """
+        :param str filepath: Path of the template file
+        :param bool is_starter: Whether the template comes from the starter
+            assets directory or from the user templates directory
+        """
         self.filepath = filepath
         self.filename = os.path.basename(filepath)
-        self.name = None
-        self.type = None
 
-        file_no_ext = os.path.splitext(self.filename)[0]
-        if "starter_assets" in filepath:
-            self.name = f"{file_no_ext} (starter_assets)"
+        if is_starter:
             self.type = SPTemplateType.STARTER_ASSETS
         else:
-            self.name = f"{file_no_ext} (your_assets)"
             self.type = SPTemplateType.USER_ASSETS
 
+        file_no_ext = os.path.splitext(self.filename)[0]
+        self.name = f"{file_no_ext} ({self.type.value})"
+
     def __lt__(self, other):
         return self.name < other.name
 
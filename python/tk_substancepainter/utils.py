@@ -21,24 +21,153 @@ __author__ = "Donat Van Bellinghen"
 __contact__ = "https://www.linkedin.com/in/donat-van-bellinghen"
 __credits__ = ["Diego Garcia Huerta", "Donat Van Bellinghen"]
 
+import contextlib
+import functools
 import os
-import platform
 import sys
 
 import sgtk
 import substance_painter as sp
 
+_IS_WINDOWS = sys.platform == "win32"
 
-def _convert_unc_path_to_mapped_drive_path(engine, filepath):
+
+@functools.lru_cache(maxsize=1)
+def _get_prepared_mappings(engine):
     """
-    Replace the UNC prefix in 'filepath' with the corresponding mapped drive prefix
-    based on the 'windows_path_mappings' setting of the engine
+    Prepare the 'windows_path_mappings' setting of the engine for the path
+    conversions: the prefixes are case folded once and indexed by their drive
+    (e.g. 'x:' or '\\\\server\\share'), so a path is only compared to the
+    prefixes sharing its drive.
+
+    The result is cached for the last engine, the cache must be cleared when
+    the engine settings change (e.g. on context change).
+
+    Parameters
+    ----------
+    engine : the substance painter engine
+
+    Returns
+    -------
+    dict
+        For each conversion direction (the 'to_unc' argument of _convert_path),
+        a dict of case folded drive to a tuple of (mapping index, case folded
+        source prefix, target prefix) tuples, in the order of the mappings.
+        Incomplete mappings are skipped.
+    """
+    prepared_mappings = {True: {}, False: {}}
+    for index, mapping in enumerate(engine.get_setting("windows_path_mappings") or []):
+        unc_prefix = mapping.get("unc_prefix", "")
+        mapped_prefix = mapping.get("mapped_drive_prefix", "")
+
+        if not unc_prefix or not mapped_prefix:
+            continue
+
+        # Normalized like the converted paths, see _normpath
+        unc_prefix = os.path.normpath(unc_prefix)
+        mapped_prefix = os.path.normpath(mapped_prefix)
+
+        for to_unc, source_prefix, target_prefix in (
+            (False, unc_prefix, mapped_prefix),
+            (True, mapped_prefix, unc_prefix),
+        ):
+            source_prefix_cf = source_prefix.casefold()
+            drive = os.path.splitdrive(source_prefix_cf)[0]
+            if not _is_complete_drive(drive):
+                # e.g. a bare '\\server', it can't be matched by drive
+                drive = ""
+            prepared_mappings[to_unc].setdefault(drive, []).append(
+                (index, source_prefix_cf, target_prefix)
+            )
+
+    return {
+        to_unc: {drive: tuple(prefixes) for drive, prefixes in by_drive.items()}
+        for to_unc, by_drive in prepared_mappings.items()
+    }
+
+
+def _is_complete_drive(drive):
+    """
+    Whether 'drive' is a drive letter or a UNC drive including its share
+
+    Parameters
+    ----------
+    drive : str
+        The drive part of a path, as returned by os.path.splitdrive
+
+    Returns
+    -------
+    bool
+    """
+    if drive[1:2] == ":":
+        return True
+    return "\\" in drive[2:].rstrip("\\")
+
+
+def _normpath(filepath):
+    """
+    Normalize a Windows path, skipping os.path.normpath for the paths which
+    are already normalized, e.g. the ones resolved from templates.
+
+    Parameters
+    ----------
+    filepath : str
+        The path to normalize.
+
+    Returns
+    -------
+    str
+        The normalized path.
+    """
+    if (
+        "/" not in filepath
+        and "\\." not in filepath
+        and "\\\\" not in filepath[1:]
+        and not filepath.endswith("\\")
+        and not filepath.startswith(".")
+    ):
+        return filepath
+    return os.path.normpath(filepath)
+
+
+def _get_case_folded_prefix_length(filepath, case_folded_length):
+    """
+    Returns the length of the prefix of 'filepath' whose case folded form is
+    'case_folded_length' characters long
+
+    Parameters
+    ----------
+    filepath : str
+        The path, not case folded.
+    case_folded_length : int
+        The length of the case folded prefix.
+
+    Returns
+    -------
+    int
+        The length of the prefix in 'filepath'.
+    """
+    length = 0
+    for index, char in enumerate(filepath):
+        if length >= case_folded_length:
+            return index
+        length += len(char.casefold())
+    return len(filepath)
+
+
+def _convert_path(engine, filepath, to_unc):
+    """
+    Replace the prefix of 'filepath' based on the 'windows_path_mappings'
+    setting of the engine
 
     Parameters
     ----------
     engine : the substance painter engine
     filepath : str
         The full path to convert.
+    to_unc : bool
+        True to replace a mapped drive prefix with its UNC prefix, False to
+        replace a UNC prefix with its mapped drive prefix.
 
     Returns
     -------
@@ -46,58 +175,116 @@ def _convert_unc_path_to_mapped_drive_path(engine, filepath):
         The converted path if a mapping applies, otherwise the original filepath.
     """
 
-    if not platform.system() == "Windows":
+    if not _IS_WINDOWS:
         # If the OS is not Windows, nothing to do
         return filepath
 
-    mappings = engine.get_setting("windows_path_mappings")
+    mappings_by_drive = _get_prepared_mappings(engine)[to_unc]
 
-    if not mappings:
+    if not mappings_by_drive:
         return filepath
 
-    filepath = os.path.normpath(filepath)
-    normalized_filepath = filepath.lower()
+    filepath = _normpath(filepath)
+    normalized_filepath = filepath.casefold()
 
-    for mapping in mappings:
-        unc_prefix = mapping.get("unc_prefix", "")
-        mapped_prefix = mapping.get("mapped_drive_prefix", "")
+    drive = os.path.splitdrive(normalized_filepath)[0]
+    buckets = [mappings_by_drive.get(drive, ())]
+    if drive:
+        # Mappings whose prefix has no complete drive
+        buckets.append(mappings_by_drive.get("", ()))
 
-        if not unc_prefix or not mapped_prefix:
-            continue
+    # The first configured mapping that applies wins: take the first match of
+    # each bucket, and keep the one with the lowest mapping index
+    match = None
+    for bucket in buckets:
+        for index, source_prefix_cf, target_prefix in bucket:
+            if match is not None and index > match[0]:
+                break
+            # Case-insensitive match on the prefix
+            if normalized_filepath.startswith(source_prefix_cf):
+                match = (index, source_prefix_cf, target_prefix)
+                break
 
-        # Case-insensitive match on the prefix
-        if normalized_filepath.startswith(unc_prefix.lower()):
-            # Replace only the prefix, preserving case of the rest
-            return filepath.replace(unc_prefix, mapped_prefix, 1)
+    if match is None:
+        return filepath
 
-    return filepath
+    _, source_prefix_cf, target_prefix = match
+    # Replace only the prefix, preserving case of the rest
+    prefix_length = len(source_prefix_cf)
+    if len(normalized_filepath) != len(filepath):
+        # Case folding changed the length, e.g. 'ß' -> 'ss'
+        prefix_length = _get_case_folded_prefix_length(filepath, prefix_length)
+    return target_prefix + filepath[prefix_length:]
 
 
+def _convert_unc_path_to_mapped_drive_path(engine, filepath):
+    """
+    Replace the UNC prefix in 'filepath' with the corresponding mapped drive prefix
+    based on the 'windows_path_mappings' setting of the engine
 
-def _convert_mapped_drive_path_to_unc_path(engine, filepath):
+    Parameters
+    ----------
+    engine : the substance painter engine
+    filepath : str
+        The full path to convert.
 
-    if not platform.system() == "Windows":
-        # If the OS is not Windows, nothing to do
-        return filepath
+    Returns
+    -------
+    str
+        The converted path if a mapping applies, otherwise the original filepath.
+    """
+    return _convert_path(engine, filepath, to_unc=False)
 
-    mappings = engine.get_setting("windows_path_mappings")
 
-    if not mappings:
-        return filepath
+def _convert_mapped_drive_path_to_unc_path(engine, filepath):
+    """
+    Replace the mapped drive prefix in 'filepath' with the corresponding UNC
+    prefix based on the 'windows_path_mappings' setting of the engine
 
-    filepath = os.path.normpath(filepath)
-    normalized_filepath = filepath.lower()
+    Parameters
+    ----------
+    engine : the substance painter engine
+    filepath : str
+        The full path to convert.
 
-    for mapping in mappings:
-        unc_prefix = mapping.get("unc_prefix", "")
-        mapped_prefix = mapping.get("mapped_drive_prefix", "")
+    Returns
+    -------
+    str
+        The converted path if a mapping applies, otherwise the original filepath.
+    """
+    return _convert_path(engine, filepath, to_unc=True)
 
-        if not unc_prefix or not mapped_prefix:
-            continue
 
-        # Case-insensitive match on the prefix
-        if normalized_filepath.startswith(mapped_prefix.lower()):
-            # Replace only the prefix, preserving case of the rest
-            return filepath.replace(mapped_prefix, unc_prefix, 1)
+@contextlib.contextmanager
+def busy_indicator(message):
+    """
+    Show a progress dialog and a wait cursor while a blocking Substance Painter
+    operation (open, save...) runs.
+
+    The Substance Painter API can only be called from the main thread, so such
+    operations can't be moved to a worker thread: this keeps the user informed
+    while the UI is blocked.
+
+    Parameters
+    ----------
+    message : str
+        The text displayed in the progress dialog.
+    """
+    from sgtk.platform.qt6 import QtCore, QtWidgets
 
-    return filepath
\ No newline at end of file
+    progress = QtWidgets.QProgressDialog(message, None, 0, 0, sp.ui.get_main_window())
+    progress.setCancelButton(None)
+    progress.setWindowModality(QtCore.Qt.WindowModal)
+    progress.setMinimumDuration(0)
+    progress.show()
+    # Paint the dialog before blocking, without processing the user input
+    QtWidgets.QApplication.processEvents(
+        QtCore.QEventLoop.ProcessEventsFlag.ExcludeUserInputEvents
+    )
+    QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+    try:
+        yield
+    finally:
+        QtWidgets.QApplication.restoreOverrideCursor()
+        progress.close()
+        progress.deleteLater()
@@ -0,0 +1,61 @@
+# Copyright 2025 Donat Van Bellinghen
+#
+# Inspired by original work by Diego Garcia Huerta (2019)
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Your use of the Flow Production Tracking Pipeline Toolkit is governed by the applicable
+# license agreement between you and Autodesk.
+
+__author__ = "Donat Van Bellinghen"
+__contact__ = "https://www.linkedin.com/in/donat-van-bellinghen"
+__credits__ = ["Diego Garcia Huerta", "Donat Van Bellinghen"]
+
+
+# Windows shell folders lookups, shared by the engine and the launcher.
+# This module only depends on the standard library and sgtk: the launcher
+# (startup.py) runs outside of Substance 3D Painter and loads it from its path,
+# as it can't import the tk_substancepainter package.
+
+import uuid
+
+import sgtk
+
+logger = sgtk.LogManager.get_logger(__name__)
+
+# Known folder id of the user's Documents directory on Windows
+FOLDERID_DOCUMENTS = uuid.UUID("{FDD39AD0-238F-46AF-ADB4-6C85480369C7}")
+
+
+def get_documents_directory():
+    """
+    Returns the user's Documents directory as known by the Windows shell,
+    which accounts for folder redirection (OneDrive, roaming profiles...).
+
+    :return: Path to the Documents directory, or None if it can't be retrieved.
+    """
+    import ctypes
+
+    folder_id = (ctypes.c_char * 16).from_buffer_copy(FOLDERID_DOCUMENTS.bytes_le)
+    path_ptr = ctypes.c_wchar_p()
+    result = ctypes.windll.shell32.SHGetKnownFolderPath(
+        ctypes.byref(folder_id), 0, None, ctypes.byref(path_ptr)
+    )
+    try:
+        if result != 0:
+            logger.debug(f"SHGetKnownFolderPath failed with HRESULT {result}")
+            return None
+        return path_ptr.value
+    finally:
+        # The buffer is allocated by the shell, even on failure it may be set
+        ctypes.windll.ole32.CoTaskMemFree(path_ptr)
@@ -16,9 +16,14 @@
 # license agreement between you and Autodesk.
 
 
+import concurrent.futures
+import functools
+import importlib.util
 import os
 import plistlib
+import re
 import shutil
+import stat
 import sys
 
 import tank as sgtk
@@ -37,6 +42,30 @@ UNKNOWN_VERSION = "UNKNOWN_VERSION"
 
 MINIMUM_SUPPORTED_VERSION = "13.0.0"
 
+# Matches the version of an XML Info.plist
+_PLIST_SHORT_VERSION_REGEX = re.compile(
+    rb"<key>CFBundleShortVersionString</key>\s*<string>([^<]+)</string>"
+)
+
+# Paths used at each launch, relative to the user's Documents directory, the
+# Substance 3D Painter user directory and the engine directory
+_SUBSTANCE_USER_SUBDIR = os.path.join("Adobe", "Adobe Substance 3D Painter")
+_USER_PYTHON_STARTUP_SUBDIR = os.path.join("python", "startup")
+_USER_EXPORT_PRESETS_SUBDIR = os.path.join("assets", "export-presets")
+_BOOTSTRAP_SCRIPT_NAME = "shotgrid_bootstrap.py"
+_BOOTSTRAP_SCRIPT_SUBPATH = os.path.join("startup", _BOOTSTRAP_SCRIPT_NAME)
+
+# The key of the current OS in the executable templates
+_THIS_PLATFORM = "linux" if sys.platform.startswith("linux") else sys.platform
+
+# The Windows shell folders lookups, shared with the engine
+_WINDOWS_FOLDERS_MODULE_PATH = os.path.join(
+    os.path.dirname(__file__), "python", "tk_substancepainter", "windows_folders.py"
+)
+
+# Kernel side copies (Linux 4.5+): no data goes through user space
+_HAS_COPY_FILE_RANGE = hasattr(os, "copy_file_range")
+
 
 class SubstancePainterLauncher(SoftwareLauncher):
     """
@@ -89,29 +118,74 @@ class SubstancePainterLauncher(SoftwareLauncher):
 
         # Get the substance painter user python startup directory
         user_python_startup_directory = os.path.join(
-            substance_user_directory, "python", "startup"
+            substance_user_directory, _USER_PYTHON_STARTUP_SUBDIR
         )
         ensure_folder_exists(user_python_startup_directory)
 
         user_export_presets_directory = os.path.join(
-            substance_user_directory, "assets", "export-presets"
+            substance_user_directory, _USER_EXPORT_PRESETS_SUBDIR
         )
         ensure_folder_exists(user_export_presets_directory)
 
+        # The files are copied individually, rather than extracted from a
+        # bundle, as they have different overwrite rules: the bootstrap script
+        # is kept up to date while the presets the user may have edited are
+        # left untouched. On a usual launch both are already installed and
+        # nothing is copied.
         bootstrap_script_filepath = os.path.join(
-            self.disk_location, "startup", "shotgrid_bootstrap.py"
+            self.disk_location, _BOOTSTRAP_SCRIPT_SUBPATH
         )
         # Copy the bootstrap python script to the user's substance python startup dir
         # This will make substance import the code automatically during launch
-        self.copy_file(
-            bootstrap_script_filepath, user_python_startup_directory, overwrite=True
+        # The copy is skipped when the installed script is already up to date
+        installed_bootstrap_script_filepath = os.path.join(
+            user_python_startup_directory, _BOOTSTRAP_SCRIPT_NAME
         )
+        if _is_same_file_content(
+            bootstrap_script_filepath, installed_bootstrap_script_filepath
+        ):
+            self.logger.debug(
+                f"Bootstrap script is up to date: {installed_bootstrap_script_filepath}"
+            )
+        else:
+            # Only its modification time is needed, to tell it's up to date
+            self.copy_file(
+                bootstrap_script_filepath,
+                user_python_startup_directory,
+                overwrite=True,
+                copy_metadata=False,
+            )
 
         # Copy the ShotGrid export presets to the user's substance painter documents
         # If exports presets already exists, leave them untouched
+        # The copies are independent and mostly wait on the filesystem, so they
+        # are done in parallel
         sg_export_presets = self._get_shotgrid_export_presets()
-        for exp in sg_export_presets:
-            self.copy_file(exp, user_export_presets_directory, overwrite=False)
+        # List the existing presets once rather than checking each target
+        existing_export_presets = set(os.listdir(user_export_presets_directory))
+        sg_export_presets = [
+            exp
+            for exp in sg_export_presets
+            if os.path.basename(exp) not in existing_export_presets
+        ]
+        if not sg_export_presets:
+            self.logger.debug("The ShotGrid export presets are already installed.")
+        else:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(8, len(sg_export_presets))
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        self.copy_file,
+                        exp,
+                        user_export_presets_directory,
+                        overwrite=False,
+                    )
+                    for exp in sg_export_presets
+                ]
+                # Raise the first copy error, if any
+                for future in futures:
+                    future.result()
 
         # Prepare the launch environment with variables required by the
         # classic bootstrap approach.
@@ -119,9 +193,10 @@ class SubstancePainterLauncher(SoftwareLauncher):
             "Preparing SubstancePainter Launch via Toolkit Classic methodology ..."
         )
 
-        required_env = {}
-        required_env["SGTK_ENGINE"] = self.engine_name
-        required_env["SGTK_CONTEXT"] = sgtk.context.serialize(self.context)
+        required_env = {
+            "SGTK_ENGINE": self.engine_name,
+            "SGTK_CONTEXT": sgtk.context.serialize(self.context),
+        }
 
         # Pass the file to open to the engine via an environment variable.
         if file_to_open:
@@ -129,7 +204,9 @@ class SubstancePainterLauncher(SoftwareLauncher):
 
         return LaunchInformation(path=exec_path, environ=required_env)
 
-    def copy_file(self, source_path, target_directory, overwrite=False):
+    def copy_file(
+        self, source_path, target_directory, overwrite=False, copy_metadata=True
+    ):
         """
         Copy a file to a target directory
 
@@ -137,18 +214,25 @@ class SubstancePainterLauncher(SoftwareLauncher):
             source_path: Full path to the source file
             target_directory: Path to the target directory
             overwrite: If False (default), skips copy if target file exists
+            copy_metadata: If True (default), copies the permissions, timestamps
+                and extended attributes like shutil.copy2(), otherwise only the
+                timestamps where they aren't copied along with the data
 
         Returns:
             str or None: Path to the copied file, or None if skipped
         """
 
         # Check if source file exists
-        if not os.path.isfile(source_path):
+        source_stat = _stat_or_none(source_path)
+        if source_stat is None or not stat.S_ISREG(source_stat.st_mode):
             self.logger.error(f"Error: Source file does not exist: {source_path}")
             raise FileNotFoundError(f"Source file does not exist: {source_path}")
 
         # Check if target directory exists
-        if not os.path.isdir(target_directory):
+        target_directory_stat = _stat_or_none(target_directory)
+        if target_directory_stat is None or not stat.S_ISDIR(
+            target_directory_stat.st_mode
+        ):
             self.logger.error(
                 f"Error: Target directory does not exist: {target_directory}"
             )
@@ -162,13 +246,13 @@ class SubstancePainterLauncher(SoftwareLauncher):
         target_path = os.path.join(target_directory, filename)
 
         # If target file exists and overwrite is False, skip the copy
-        if os.path.exists(target_path) and not overwrite:
+        if not overwrite and os.path.exists(target_path):
             self.logger.info(f"File already exists, skipping copy: {target_path}")
             return None
 
         try:
             # Copy the file
-            shutil.copy2(source_path, target_path)
+            self._native_copy(source_path, target_path, copy_metadata)
             self.logger.info(
                 f"Successfully copied '{filename}' to '{target_directory}'"
             )
@@ -178,6 +262,97 @@ class SubstancePainterLauncher(SoftwareLauncher):
             self.logger.error(f"Error during copy: {e}")
             raise
 
+    def _native_copy(self, source_path, target_path, copy_metadata=True):
+        """
+        Copy a file and its metadata like shutil.copy2(), using the copy
+        primitive of the OS where available: CopyFileW on Windows, clonefile
+        on macOS (copy on write clone on APFS) and copy_file_range on Linux.
+        Falls back to shutil.copyfile() if the native copy fails.
+
+        :param str source_path: Path of the file to copy
+        :param str target_path: Path of the copy
+        :param bool copy_metadata: Whether to copy all the metadata or only the
+            timestamps, when they aren't copied by the native copy itself
+        """
+        try:
+            if sys.platform == "win32":
+                self._copy_file_w(source_path, target_path)
+                return
+            elif sys.platform == "darwin":
+                # clonefile can't replace an existing file
+                if not os.path.exists(target_path):
+                    self._clonefile(source_path, target_path)
+                    return
+            elif _HAS_COPY_FILE_RANGE:
+                self._copy_file_range(source_path, target_path)
+                _copy_metadata(source_path, target_path, copy_metadata)
+                return
+        except OSError as e:
+            # e.g. ENOSYS or EXDEV, or a filesystem that doesn't support it
+            self.logger.debug(
+                f"Native copy of '{source_path}' failed ({e}), using shutil"
+            )
+
+        shutil.copyfile(source_path, target_path)
+        _copy_metadata(source_path, target_path, copy_metadata)
+
+    def _copy_file_w(self, source_path, target_path):
+        """
+        Copy a file with the Windows CopyFileW function, which also copies
+        its attributes and timestamps.
+
+        :param str source_path: Path of the file to copy
+        :param str target_path: Path of the copy, replaced if it exists
+        :raises OSError: If the copy fails
+        """
+        import ctypes
+
+        copy_file_w = ctypes.windll.kernel32.CopyFileW
+        copy_file_w.argtypes = [ctypes.c_wchar_p, ctypes.c_wchar_p, ctypes.c_bool]
+        copy_file_w.restype = ctypes.c_bool
+        if not copy_file_w(source_path, target_path, False):
+            raise ctypes.WinError()
+
+    def _clonefile(self, source_path, target_path):
+        """
+        Clone a file with the macOS clonefile function, which shares the data
+        blocks of the source on APFS and copies its metadata.
+
+        :param str source_path: Path of the file to copy
+        :param str target_path: Path of the copy, must not exist
+        :raises OSError: If the clone fails, e.g. on a non APFS volume
+        """
+        import ctypes
+
+        libc = ctypes.CDLL("/usr/lib/libSystem.B.dylib", use_errno=True)
+        libc.clonefile.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_int]
+        libc.clonefile.restype = ctypes.c_int
+        if libc.clonefile(os.fsencode(source_path), os.fsencode(target_path), 0):
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), source_path)
+
+    def _copy_file_range(self, source_path, target_path):
+        """
+        Copy the data of a file with os.copy_file_range(), letting the kernel
+        (or the filesystem) move the data.
+
+        :param str source_path: Path of the file to copy
+        :param str target_path: Path of the copy
+        :raises OSError: If the kernel can't copy the file this way
+        """
+        with open(source_path, "rb") as source, open(target_path, "wb") as target:
+            source_fd = source.fileno()
+            target_fd = target.fileno()
+            remaining = os.fstat(source_fd).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(source_fd, target_fd, remaining)
+                if not copied:
+                    break
+                remaining -= copied
+            if remaining:
+                # The file shrank, or the filesystem stopped copying
+                raise OSError(f"copy_file_range stopped with {remaining} bytes left")
+
     def _get_icon(self, exec_path):
         """
         Find the icon for the application.
@@ -222,7 +397,7 @@ class SubstancePainterLauncher(SoftwareLauncher):
         self.logger.debug("Scanning for Substance 3D Painter executables...")
 
         supported_sw_versions = []
-        for sw_version in self._find_software():
+        for sw_version in self._find_software(stop_on_first_supported=True):
             (supported, reason) = self._is_supported(sw_version)
 
             if supported:
@@ -234,54 +409,114 @@ class SubstancePainterLauncher(SoftwareLauncher):
 
         return supported_sw_versions
 
-    def _find_software(self):
+    def _find_software(self, stop_on_first_supported=False):
         """
         Find executables in the default install locations.
+
+        :param bool stop_on_first_supported: Stop looking once a supported
+            executable is found, Substance 3D Painter is usually installed once.
+        :return: A list of :class:`SoftwareVersion` objects.
         """
 
         # all the executable templates for the current OS
-        platform = "linux" if sys.platform.startswith("linux") else sys.platform
-        executable_templates = self.EXECUTABLE_TEMPLATES.get(platform, [])
+        executable_templates = self.EXECUTABLE_TEMPLATES.get(_THIS_PLATFORM, [])
 
-        # all the discovered executables
-        sw_versions = []
+        # all the matching executables and the template they come from
+        executable_matches = []
 
         for executable_template in executable_templates:
             self.logger.debug("Processing template %s.", executable_template)
 
-            executable_matches = self._glob_and_match(
-                executable_template, self.COMPONENT_REGEX_LOOKUP
-            )
-
-            # Extract all products from that executable.
-            for executable_path, key_dict in executable_matches:
-                # extract the matched keys form the key_dict (default to None
-                # if not included)
-                if sys.platform == "win32":
-                    executable_version = self.get_windows_executable_version(
-                        executable_path
+            if _is_literal_path(executable_template):
+                # Nothing to glob or match, a single stat is enough
+                if os.path.exists(executable_template):
+                    executable_matches.append(
+                        (executable_template, {}, executable_template)
                     )
-                elif sys.platform == "darwin":
-                    executable_version = self._get_mac_executable_version(
-                        executable_path
+            else:
+                for executable_path, key_dict in self._glob_and_match(
+                    executable_template, self.COMPONENT_REGEX_LOOKUP
+                ):
+                    executable_matches.append(
+                        (executable_path, key_dict, executable_template)
                     )
-                else:
-                    executable_version = key_dict.get("version", UNKNOWN_VERSION)
 
-                self.logger.debug(
-                    "Software found: %s | %s.", executable_version, executable_template
+        # The way to read the versions depends on the OS, pick it once
+        get_software_details = functools.partial(
+            self._get_software_details, self._get_version_reader()
+        )
+
+        # Reading the versions (Info.plist, version resource) and looking for
+        # the icons only waits on the filesystem, do it in parallel when there
+        # are several executables
+        if len(executable_matches) > 1:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(4, len(executable_matches))
+            ) as executor:
+                sw_details = list(
+                    executor.map(get_software_details, executable_matches)
                 )
-                sw_versions.append(
-                    SoftwareVersion(
-                        executable_version,
-                        "Adobe Substance 3D Painter",
-                        executable_path,
-                        self._get_icon(executable_path),
-                    )
+        else:
+            sw_details = [
+                get_software_details(executable_match)
+                for executable_match in executable_matches
+            ]
+
+        # all the discovered executables
+        sw_versions = []
+
+        for executable_match, (executable_version, icon_path) in zip(
+            executable_matches, sw_details
+        ):
+            executable_path, _, executable_template = executable_match
+            self.logger.debug(
+                "Software found: %s | %s.", executable_version, executable_template
+            )
+            sw_versions.append(
+                SoftwareVersion(
+                    executable_version,
+                    "Adobe Substance 3D Painter",
+                    executable_path,
+                    icon_path,
                 )
+            )
+
+            if stop_on_first_supported and self._is_supported(sw_versions[-1])[0]:
+                return sw_versions
 
         return sw_versions
 
+    def _get_version_reader(self):
+        """
+        Returns the function reading the version of an executable on the
+        current OS, or None if the version comes from the template keys.
+        """
+        if _THIS_PLATFORM == "win32":
+            return self._get_windows_executable_version
+        if _THIS_PLATFORM == "darwin":
+            return self._get_mac_executable_version
+        return None
+
+    def _get_software_details(self, read_version, executable_match):
+        """
+        Get the version and the icon of a matching executable.
+
+        :param read_version: The function returned by _get_version_reader.
+        :param tuple executable_match: The executable path, the matched keys
+            and the template it comes from.
+        :return: A (version, icon path) tuple.
+        """
+        executable_path, key_dict, _ = executable_match
+
+        if read_version is not None:
+            executable_version = read_version(executable_path)
+        else:
+            # extract the matched keys form the key_dict (default to None
+            # if not included)
+            executable_version = key_dict.get("version", UNKNOWN_VERSION)
+
+        return executable_version, self._get_icon(executable_path)
+
     def _get_mac_executable_version(self, bundle_path):
         """
         Get the version number from the app bundle's Info.plist file.
@@ -289,11 +524,9 @@ class SubstancePainterLauncher(SoftwareLauncher):
         :param str bundle_path: Path to the .app bundle.
         :return: The version string or UNKNOWN_VERSION.
         """
+        plist_path = os.path.join(bundle_path, "Contents", "Info.plist")
         try:
-            plist_path = os.path.join(bundle_path, "Contents", "Info.plist")
-            with open(plist_path, "rb") as fp:
-                plist_data = plistlib.load(fp)
-            return plist_data.get("CFBundleShortVersionString", UNKNOWN_VERSION)
+            return _read_bundle_short_version(plist_path)
         except Exception as e:
             self.logger.warning("Could not read version from %s: %s", plist_path, e)
             return UNKNOWN_VERSION
@@ -301,69 +534,22 @@ class SubstancePainterLauncher(SoftwareLauncher):
     def _get_windows_executable_version(self, filepath):
         """
         Extracts the "FileVersion" information string from a Windows executable's
-        """
-        from ctypes import (
-            POINTER,
-            byref,
-            c_uint,
-            c_ushort,
-            c_void_p,
-            c_wchar_p,
-            cast,
-            create_string_buffer,
-            windll,
-        )
-
-        size = windll.version.GetFileVersionInfoSizeW(filepath, None)
-        if not size:
-            return ""
-
-        res = create_string_buffer(size)
-        if not windll.version.GetFileVersionInfoW(filepath, 0, size, res):
-            return ""
-
-        # --- Get language and codepage ---
-        lpTranslate = c_void_p()
-        cbTranslate = c_uint()
-        if not windll.version.VerQueryValueW(
-            res, "\\VarFileInfo\\Translation", byref(lpTranslate), byref(cbTranslate)
-        ):
-            return ""
-
-        if not cbTranslate.value:
-            return ""
-
-        # Each translation entry is two WORDs: language ID and code page.
-        array_type = c_ushort * (cbTranslate.value // 2)
-        translations = cast(lpTranslate.value, POINTER(array_type)).contents
-        lang, codepage = translations[0], translations[1]
-
-        # --- Extract the requested string ---
-        sub_block = "\\StringFileInfo\\%04x%04x\\%s" % (lang, codepage, "FileVersion")
-        lpBuffer = c_void_p()
-        size = c_uint()
-        if not windll.version.VerQueryValueW(
-            res, sub_block, byref(lpBuffer), byref(size)
-        ):
-            return ""
+        version resource.
 
-        # lpBuffer points to a null-terminated wide string
-        result = cast(lpBuffer.value, c_wchar_p).value.strip("\x00")
-
-        return result
+        :param str filepath: Path to the executable.
+        :return: The version string, or an empty string if it can't be read.
+        """
+        return _read_windows_file_version(filepath)
 
     def _get_shotgrid_export_presets(self):
-        sg_export_presets_dir = os.path.join(
-            self.disk_location, "resources", "export-presets"
-        )
-
-        sg_export_presets = [
-            os.path.join(sg_export_presets_dir, f)
-            for f in os.listdir(sg_export_presets_dir)
-            if os.path.splitext(f)[1] == ".spexp"
-        ]
+        """
+        Returns the ShotGrid export presets shipped with the engine.
 
-        return sg_export_presets
+        :return: A tuple of .spexp file paths.
+        """
+        return _list_export_presets(
+            os.path.join(self.disk_location, "resources", "export-presets")
+        )
 
     def _get_substance_painter_user_directory(self):
         """
@@ -372,30 +558,241 @@ class SubstancePainterLauncher(SoftwareLauncher):
 
         :return: Path to the user directory.
         """
+        sp_user_dir = os.path.join(
+            _get_user_documents_directory(), _SUBSTANCE_USER_SUBDIR
+        )
 
-        sp_user_dir = None
+        ensure_folder_exists(sp_user_dir)
 
-        if sys.platform == "win32":
-            import winreg
+        return sp_user_dir
 
-            win_reg_key = winreg.OpenKey(
-                winreg.HKEY_CURRENT_USER,
-                r"Software\Microsoft\Windows\CurrentVersion\Explorer\User Shell Folders",
-            )
-            user_documents_path = os.path.expandvars(
-                winreg.QueryValueEx(win_reg_key, "Personal")[0]
-            )
 
-            sp_user_dir = os.path.join(
-                user_documents_path,
-                "Adobe",
-                "Adobe Substance 3D Painter",
-            )
-        else:  # macOS and Linux
-            sp_user_dir = os.path.expanduser(
-                r"~/Documents/Adobe/Adobe Substance 3D Painter"
-            )
+def _copy_metadata(source_path, target_path, copy_metadata):
+    """
+    Copy the metadata of a file to its copy.
 
-        ensure_folder_exists(sp_user_dir)
+    :param str source_path: Path of the copied file
+    :param str target_path: Path of the copy
+    :param bool copy_metadata: If True, copy the permissions, timestamps and
+        extended attributes like shutil.copystat(). Otherwise only copy the
+        timestamps, which skips the chmod and extended attributes calls.
+    """
+    if copy_metadata:
+        shutil.copystat(source_path, target_path)
+    else:
+        source_stat = os.stat(source_path)
+        os.utime(target_path, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
 
-        return sp_user_dir
+
+def _stat_or_none(path):
+    """
+    Returns the stat result of a path, or None if it can't be stat'ed.
+
+    :param str path: The path.
+    :return: An :class:`os.stat_result` or None.
+    """
+    try:
+        return os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_same_file_content(source_path, target_path):
+    """
+    Whether two files have the same content. The sizes and modification times
+    are compared first, the contents are only read when the sizes match but
+    the modification times differ.
+
+    :param str source_path: Path to the first file.
+    :param str target_path: Path to the second file, which may not exist.
+    :return: True if both files exist and have the same content.
+    """
+    try:
+        source_stat = os.stat(source_path)
+        target_stat = os.stat(target_path)
+    except OSError:
+        return False
+
+    if source_stat.st_size != target_stat.st_size:
+        return False
+    if source_stat.st_mtime_ns == target_stat.st_mtime_ns:
+        return True
+
+    # Small files (the bootstrap script): comparing the bytes is cheaper than
+    # hashing them
+    with open(source_path, "rb") as source_fp, open(target_path, "rb") as target_fp:
+        return source_fp.read() == target_fp.read()
+
+
+def _is_literal_path(executable_template):
+    """
+    Whether an executable template is a plain path, with neither glob
+    characters nor format placeholders for the component regexes.
+
+    :param str executable_template: The executable template.
+    :return: True if the template can be checked with a simple stat.
+    """
+    return not any(char in executable_template for char in "*?[{")
+
+
+def _read_bundle_short_version(plist_path):
+    """
+    Reads the CFBundleShortVersionString of an Info.plist file.
+
+    XML plists, the usual format in application bundles, are searched for the
+    key with a regex instead of being fully parsed. Binary plists, and XML
+    plists the regex doesn't match, are parsed with plistlib.
+
+    :param str plist_path: Path to the Info.plist file.
+    :return: The version string or UNKNOWN_VERSION.
+    """
+    with open(plist_path, "rb") as fp:
+        plist_bytes = fp.read()
+
+    if not plist_bytes.startswith(b"bplist00"):
+        match = _PLIST_SHORT_VERSION_REGEX.search(plist_bytes)
+        if match:
+            return match.group(1).decode("utf-8").strip()
+
+    plist_data = plistlib.loads(plist_bytes)
+    return plist_data.get("CFBundleShortVersionString", UNKNOWN_VERSION)
+
+
+def _get_version_api():
+    """
+    Returns the Windows version.dll functions, with their prototypes declared
+    so ctypes doesn't have to guess the argument types.
+
+    :return: A (GetFileVersionInfoSizeW, GetFileVersionInfoW, VerQueryValueW)
+        tuple.
+    """
+    from ctypes import POINTER, c_uint, c_void_p, c_wchar_p, windll, wintypes
+
+    get_file_version_info_size = windll.version.GetFileVersionInfoSizeW
+    get_file_version_info_size.argtypes = [c_wchar_p, POINTER(wintypes.DWORD)]
+    get_file_version_info_size.restype = wintypes.DWORD
+
+    get_file_version_info = windll.version.GetFileVersionInfoW
+    get_file_version_info.argtypes = [
+        c_wchar_p,
+        wintypes.DWORD,
+        wintypes.DWORD,
+        c_void_p,
+    ]
+    get_file_version_info.restype = wintypes.BOOL
+
+    ver_query_value = windll.version.VerQueryValueW
+    ver_query_value.argtypes = [
+        c_void_p,
+        c_wchar_p,
+        POINTER(c_void_p),
+        POINTER(c_uint),
+    ]
+    ver_query_value.restype = wintypes.BOOL
+
+    return get_file_version_info_size, get_file_version_info, ver_query_value
+
+
+def _read_windows_file_version(filepath):
+    """
+    Reads the "FileVersion" string of a Windows executable's version resource.
+
+    :param str filepath: Path to the executable.
+    :return: The version string, or an empty string if it can't be read.
+    """
+    from ctypes import (
+        POINTER,
+        byref,
+        c_uint,
+        c_ushort,
+        c_void_p,
+        c_wchar_p,
+        cast,
+        create_string_buffer,
+    )
+
+    (
+        get_file_version_info_size,
+        get_file_version_info,
+        ver_query_value,
+    ) = _get_version_api()
+
+    size = get_file_version_info_size(filepath, None)
+    if not size:
+        return ""
+
+    res = create_string_buffer(size)
+    if not get_file_version_info(filepath, 0, size, res):
+        return ""
+
+    # --- Get language and codepage ---
+    lpTranslate = c_void_p()
+    cbTranslate = c_uint()
+    if not ver_query_value(
+        res, "\\VarFileInfo\\Translation", byref(lpTranslate), byref(cbTranslate)
+    ):
+        return ""
+
+    if not cbTranslate.value:
+        return ""
+
+    # Each translation entry is two WORDs: language ID and code page.
+    array_type = c_ushort * (cbTranslate.value // 2)
+    translations = cast(lpTranslate.value, POINTER(array_type)).contents
+    lang, codepage = translations[0], translations[1]
+
+    # --- Extract the requested string ---
+    sub_block = "\\StringFileInfo\\%04x%04x\\%s" % (lang, codepage, "FileVersion")
+    lpBuffer = c_void_p()
+    size = c_uint()
+    if not ver_query_value(res, sub_block, byref(lpBuffer), byref(size)):
+        return ""
+
+    # lpBuffer points to a null-terminated wide string
+    result = cast(lpBuffer.value, c_wchar_p).value.strip("\x00")
+
+    return result
+
+
+def _get_user_documents_directory():
+    """
+    Returns the user's Documents directory.
+
+    :return: Path to the Documents directory.
+    """
+    if sys.platform == "win32":
+        user_documents_path = _get_windows_documents_directory()
+        if user_documents_path:
+            return user_documents_path
+
+    # macOS and Linux, or fallback on Windows
+    return os.path.expanduser("~/Documents")
+
+
+def _get_windows_documents_directory():
+    """
+    Returns the user's Documents directory as known by the Windows shell.
+
+    The lookup is shared with the engine: its module is loaded from its path,
+    the tk_substancepainter package can't be imported outside of Substance 3D
+    Painter.
+
+    :return: Path to the Documents directory, or None if it can't be retrieved.
+    """
+    spec = importlib.util.spec_from_file_location(
+        "tk_substancepainter_windows_folders", _WINDOWS_FOLDERS_MODULE_PATH
+    )
+    windows_folders = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(windows_folders)
+    return windows_folders.get_documents_directory()
+
+
+def _list_export_presets(sg_export_presets_dir):
+    """
+    Lists the export presets of a directory.
+
+    :param str sg_export_presets_dir: The directory holding the presets.
+    :return: A tuple of .spexp file paths.
+    """
+    with os.scandir(sg_export_presets_dir) as entries:
+        return tuple(entry.path for entry in entries if entry.name.endswith(".spexp"))
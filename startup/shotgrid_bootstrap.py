@@ -38,12 +38,6 @@ def start_toolkit_classic():
     serialized Context to use to startup Toolkit and
     the tk-substancepainter engine and environment.
     """
-    import sgtk
-
-    logger = sgtk.LogManager.get_logger(__name__)
-
-    logger.debug("Launching toolkit in classic mode.")
-
     # Get the name of the engine to start from the environement
     env_engine = os.environ.get("SGTK_ENGINE")
     if not env_engine:
@@ -57,6 +51,14 @@ def start_toolkit_classic():
             "ShotGrid: Missing required environment variable SGTK_CONTEXT."
         )
         return
+
+    # Only import sgtk once we know there is an engine to start
+    import sgtk
+
+    logger = sgtk.LogManager.get_logger(__name__)
+
+    logger.debug("Launching toolkit in classic mode.")
+
     try:
         # Deserialize the environment context
         context = sgtk.context.deserialize(env_context)
@@ -83,6 +85,14 @@ def start_toolkit_classic():
 
 def start_plugin():
 
+    # Substance Painter was not launched by Toolkit: skip importing sgtk,
+    # which is slow, and the log file setup
+    if "SGTK_ENGINE" not in os.environ and "SGTK_CONTEXT" not in os.environ:
+        sp.logging.info(
+            "ShotGrid Bootstrap: Not launched from Toolkit, skipping engine startup."
+        )
+        return
+
     # Verify sgtk can be loaded.
     try:
         import sgtk
@@ -109,8 +119,7 @@ def start_plugin():
         "SGTK_FILE_TO_OPEN",
     ]
     for var in del_vars:
-        if var in os.environ:
-            del os.environ[var]
+        os.environ.pop(var, None)
 
 
 def close_plugin(): 